@@ -1,5 +1,12 @@
 # app/agents/__init__.py
 # Ensure booking_agent.py exists in the agents directory before importing
-from app.agents.booking_agent import booking_agent
+
+
+def __getattr__(name):
+    # Imported lazily so `import app` does not build the agent
+    if name == "booking_agent":
+        from app.agents.booking_agent import get_booking_agent
+        return get_booking_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 # app/utils/__init__.py
 from app.utils.date_parser import DateTimeParser
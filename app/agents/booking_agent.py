@@ -321,43 +321,152 @@
 
 
 
-from typing import Dict, Any, List
-from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Callable, AsyncIterator, TypedDict
+from datetime import datetime, timedelta, timezone
 from langgraph.graph import StateGraph, END
 from langchain.schema import HumanMessage, AIMessage
 from app.models.schemas import ConversationState, ConversationContext
 from app.agents.tools import agent_tools, check_calendar_availability, book_calendar_slot
-from app.services.llm_service import llm_service
+from app.services.checkpoints import get_checkpointer
+from app.services.llm_service import PRIORITY_BOOKING, PRIORITY_CHAT, get_llm_service
+from app.services.session_store import get_session_store
+from app.utils.lazy import LazySingleton
+from app.utils.metrics import record_node, trace_request
 from app.utils.date_parser import parse_natural_date_time
-from tenacity import retry, stop_after_attempt, wait_exponential
+from app.utils.validators import validate_email
+from config.settings import settings
 
+import asyncio
 import logging
+import re
 import traceback
 import time
-from openai._exceptions import RateLimitError, BadRequestError
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
-class BookingAgentState(Dict[str, Any]):
-    pass
+# Receives progress events for the turn running on the current thread. Graph
+# nodes run in a context-copying executor, so they see the caller's sink.
+_event_sink: ContextVar[Optional[Callable[[Dict[str, Any]], None]]] = ContextVar("event_sink", default=None)
+
+
+class TurnBudgetExceeded(Exception):
+    """A turn tried to make more LLM or tool calls than it is allowed"""
+
+
+class TurnBudget:
+    """LLM and tool calls one turn may make, counted as they are made"""
+
+    def __init__(self, max_llm_calls: int, max_tool_calls: int):
+        self.limits = {"llm": max_llm_calls, "tool": max_tool_calls}
+        self.used = {"llm": 0, "tool": 0}
+
+    def spend(self, kind: str) -> None:
+        if self.used[kind] >= self.limits[kind]:
+            raise TurnBudgetExceeded(f"Turn budget of {self.limits[kind]} {kind} call(s) used up")
+        self.used[kind] += 1
+
+    def remaining(self, kind: str) -> int:
+        return self.limits[kind] - self.used[kind]
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "llm_calls": self.used["llm"],
+            "max_llm_calls": self.limits["llm"],
+            "tool_calls": self.used["tool"],
+            "max_tool_calls": self.limits["tool"]
+        }
+
+
+# Budget of the turn running in this context, shared by its graph nodes
+_turn_budget: ContextVar[Optional[TurnBudget]] = ContextVar("turn_budget", default=None)
+
+EMAIL_PATTERN = re.compile(r"[\w.%+-]+@[\w.-]+\.[a-zA-Z]{2,}")
+
+# Graph runs stop before these nodes to wait for the user; the value is the
+# node whose edge leads there
+INTERRUPTED_AFTER = {"confirm_booking": "suggest_slots", "complete_booking": "confirm_booking"}
+
+AFFIRMATIVE_REPLY_PATTERN = re.compile(
+    r"\b(yes|yeah|yep|sure|confirm|ok|okay|book it|go ahead|sounds good)\b", re.IGNORECASE
+)
+NEGATIVE_REPLY_PATTERN = re.compile(r"\b(no|nope|cancel|don't|do not|never ?mind)\b", re.IGNORECASE)
+
+# A reply that is only a slot number ("2", "#2", "option 2") or starts with
+# an ordinal ("the second one"); "3pm on friday" is a new request instead
+SLOT_CHOICE_PATTERN = re.compile(
+    r"^\s*(?:(?:option|number|slot|#)\s*)?(?P<index>\d)\s*[.!)]?\s*$"
+    r"|^\s*(?:the\s+)?(?P<ordinal>first|second|third|1st|2nd|3rd)\b",
+    re.IGNORECASE
+)
+ORDINALS = {"first": 1, "1st": 1, "second": 2, "2nd": 2, "third": 3, "3rd": 3}
+
+
+def confirmation_reply(user_message: str) -> Optional[bool]:
+    """True for a yes, False for a no, None when the reply is neither or
+    both, so routing and booking read a reply the same way"""
+    affirmative = bool(AFFIRMATIVE_REPLY_PATTERN.search(user_message))
+    negative = bool(NEGATIVE_REPLY_PATTERN.search(user_message))
+    if affirmative == negative:
+        return None
+    return affirmative
+
+
+def _utc_now() -> datetime:
+    """Naive UTC, the form the calendar service reads and writes times in"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class BookingAgentState(TypedDict, total=False):
+    # Declared keys give langgraph one channel per field; a bare Dict
+    # subclass exposes no annotations on Python 3.10+ and loses state
+    user_message: str
+    session_id: str
+    context: ConversationContext
+    agent_response: str
+    extracted_info: Dict[str, Any]
+    intent: Dict[str, Any]
+    availability: List[Dict[str, Any]]
 
 class BookingAgent:
     def __init__(self):
         self.tools = {tool.name: tool for tool in agent_tools}
         self.max_suggestions = 3
         self.default_duration = 60  # minutes
-        self.lookahead_days = 3
+        # Availability searches start on the preferred day and double the
+        # window until enough slots turn up or this many days are covered
+        self.max_lookahead_days = getattr(settings, "availability_max_lookahead_days", 14)
+        # Same-day searches start at the next multiple of this many minutes
+        # past midnight rather than at the current second
+        self.slot_step_minutes = getattr(settings, "availability_slot_step_minutes", 15)
+        # Parser confidence at which the LLM round-trip in _understand_intent
+        # is skipped
+        self.fast_path_confidence = getattr(settings, "intent_fast_path_confidence", 0.9)
+        # Passed per run; the compiled graph does not accept attributes. The
+        # longest path through the graph is three nodes, so anything past
+        # this is a routing bug rather than a long turn.
+        self.recursion_limit = 10
+        self.max_llm_calls_per_turn = getattr(settings, "agent_max_llm_calls_per_turn", 1)
+        self.max_tool_calls_per_turn = getattr(settings, "agent_max_tool_calls_per_turn", 5)
         self.graph = self._build_graph()
+        # LLM and Google Calendar calls block, so graph runs go to a bounded
+        # pool instead of stalling the event loop
+        self.executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "agent_max_workers", 32),
+            thread_name_prefix="booking-agent"
+        )
 
     def _build_graph(self) -> StateGraph:
         workflow = StateGraph(BookingAgentState)
 
-        workflow.add_node("understand_intent", self._understand_intent)
-        workflow.add_node("check_availability", self._check_availability)
-        workflow.add_node("suggest_slots", self._suggest_slots)
-        workflow.add_node("confirm_booking", self._confirm_booking)
-        workflow.add_node("complete_booking", self._complete_booking)
+        workflow.add_node("understand_intent", self._timed("understand_intent", self._understand_intent))
+        workflow.add_node("ask_for_details", self._timed("ask_for_details", self._ask_for_details))
+        workflow.add_node("check_availability", self._timed("check_availability", self._check_availability))
+        workflow.add_node("suggest_slots", self._timed("suggest_slots", self._suggest_slots))
+        workflow.add_node("confirm_booking", self._timed("confirm_booking", self._confirm_booking))
+        workflow.add_node("complete_booking", self._timed("complete_booking", self._complete_booking))
 
         workflow.set_entry_point("understand_intent")
 
@@ -366,31 +475,60 @@ class BookingAgent:
             self._route_after_intent,
             {
                 "check_availability": "check_availability",
-                "need_more_info": "understand_intent",
-                "confirm_booking": "confirm_booking"
+                "need_more_info": "ask_for_details"
             }
         )
 
+        workflow.add_edge("ask_for_details", END)
         workflow.add_edge("check_availability", "suggest_slots")
-        workflow.add_edge("suggest_slots", "confirm_booking")
-        workflow.add_edge("confirm_booking", "complete_booking")
+        workflow.add_conditional_edges(
+            "suggest_slots",
+            lambda state: "confirm_booking" if state["context"].suggested_slots else END
+        )
+        workflow.add_conditional_edges(
+            "confirm_booking",
+            lambda state: "complete_booking" if state["context"].selected_slot else END
+        )
         workflow.add_edge("complete_booking", END)
 
-        compiled_graph = workflow.compile()
-        compiled_graph.recursion_limit = 40
-        return compiled_graph
+        # Picking a slot and confirming it wait for the user's next message.
+        # The run is checkpointed per session and stops before those nodes;
+        # the follow-up turn ("2", "yes") resumes there without another LLM
+        # or calendar round-trip.
+        return workflow.compile(
+            checkpointer=get_checkpointer(),
+            interrupt_before=list(INTERRUPTED_AFTER)
+        )
 
-    @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def _call_llm_with_retry(self, messages: List[Dict[str, str]]) -> str:
-        """Wrapper for LLM calls with retry logic"""
-        try:
-            return llm_service.generate_response(messages)
-        except RateLimitError as e:
-            logger.warning(f"Rate limit exceeded: {str(e)}")
-            raise
-        except BadRequestError as e:
-            logger.error(f"Invalid request: {str(e)}")
-            raise
+    def _timed(
+        self,
+        node: str,
+        func: Callable[[BookingAgentState], BookingAgentState]
+    ) -> Callable[[BookingAgentState], BookingAgentState]:
+        """Wrap a graph node so its run time lands in the request trace"""
+        def run(state: BookingAgentState) -> BookingAgentState:
+            started = time.perf_counter()
+            try:
+                return func(state)
+            finally:
+                record_node(node, time.perf_counter() - started)
+        return run
+
+    def _call_llm(self, messages: List[Dict[str, str]], priority: int = PRIORITY_CHAT) -> str:
+        """LLM call streamed to the turn's event sink, if any. Rate limits are
+        handled by the shared scheduler, not retried per request."""
+        budget = _turn_budget.get()
+        if budget is not None:
+            budget.spend("llm")
+        sink = _event_sink.get()
+        on_token = (lambda token: sink({"type": "token", "content": token})) if sink else None
+        return get_llm_service().generate_response(messages, on_token=on_token, priority=priority)
+
+    def _run_tool(self, tool, tool_input: Dict[str, Any]) -> Any:
+        budget = _turn_budget.get()
+        if budget is not None:
+            budget.spend("tool")
+        return tool.run(tool_input)
 
     def _validate_state(self, state: BookingAgentState) -> None:
         """Validate required state fields"""
@@ -405,31 +543,29 @@ class BookingAgent:
             user_message = state["user_message"]
             context = state["context"]
 
-            system_prompt = f"""
-            You are a helpful calendar booking assistant. Analyze the user's message and extract booking information.
-
-            Current conversation state: {context.state}
-            Conversation history: {context.conversation_history[-3:] if context.conversation_history else "None"}
-
-            Extract the following information if available:
-            1. Preferred date/time (convert natural language to specific datetime)
-            2. Meeting duration (default {self.default_duration} minutes)
-            3. Meeting title/purpose
-            4. Any special requirements
-
-            Current date/time: {datetime.now().isoformat()}
-            """
-
-            response = self._call_llm_with_retry([
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ])
-
+            # Only overwrite what this message mentions so details given over
+            # several turns ("tomorrow", then "at 3pm") accumulate
             parsed_info = parse_natural_date_time(user_message)
-            if parsed_info:
-                context.preferred_date = parsed_info.get("date")
-                context.preferred_time = parsed_info.get("time")
-                context.duration = parsed_info.get("duration", self.default_duration)
+            if parsed_info.get("date"):
+                context.preferred_date = parsed_info["date"]
+            if parsed_info.get("time"):
+                context.preferred_time = parsed_info["time"]
+            if parsed_info.get("duration"):
+                context.duration = parsed_info["duration"]
+
+            # Invitees mentioned by email are checked for conflicts too
+            for email in EMAIL_PATTERN.findall(user_message):
+                if validate_email(email) and email not in context.attendees:
+                    context.attendees.append(email)
+
+            confidence = parsed_info.get("confidence", 0.0)
+            if self._can_skip_llm(parsed_info):
+                logger.info(f"Parser extracted all booking details (confidence {confidence:.2f}), skipping LLM")
+                response = self._summarize_request(context)
+                state["intent"] = {"source": "parser", "confidence": confidence}
+            else:
+                response = self._ask_llm(context, user_message)
+                state["intent"] = {"source": "llm", "confidence": confidence}
 
             context.conversation_history.extend([
                 HumanMessage(content=user_message),
@@ -449,21 +585,78 @@ class BookingAgent:
             state["agent_response"] = f"⚠️ Sorry, I encountered an error: {str(e)}"
             return state
 
+    def _can_skip_llm(self, parsed_info: Dict[str, Any]) -> bool:
+        """The LLM reply is only conversational, so it is not needed when the
+        parser confidently found the date, time and duration"""
+        return (
+            all(parsed_info.get(key) for key in ("date", "time", "duration"))
+            and parsed_info.get("confidence", 0.0) >= self.fast_path_confidence
+        )
+
+    def _summarize_request(self, context: ConversationContext) -> str:
+        return (
+            f"Looking for a {context.duration}-minute slot on "
+            f"{context.preferred_date.strftime('%A, %B %d')} at "
+            f"{context.preferred_time.strftime('%I:%M %p')}."
+        )
+
+    def _ask_llm(self, context: ConversationContext, user_message: str) -> str:
+        system_prompt = f"""
+        You are a helpful calendar booking assistant. Analyze the user's message and extract booking information.
+
+        Current conversation state: {context.state}
+        Conversation history: {context.conversation_history[-3:] if context.conversation_history else "None"}
+
+        Extract the following information if available:
+        1. Preferred date/time (convert natural language to specific datetime)
+        2. Meeting duration (default {self.default_duration} minutes)
+        3. Meeting title/purpose
+        4. Any special requirements
+
+        Current date: {datetime.now().strftime('%A, %Y-%m-%d')}
+        """
+
+        # Conversations already under way are served before new ones
+        priority = PRIORITY_BOOKING if context.conversation_history else PRIORITY_CHAT
+        return self._call_llm([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ], priority)
+
+    def _ask_for_details(self, state: BookingAgentState) -> BookingAgentState:
+        """End the turn asking for what is still missing; the reply starts
+        the next turn instead of another pass through the LLM"""
+        context = state["context"]
+        if not state.get("agent_response"):
+            missing = [
+                name for name, value in (("date", context.preferred_date), ("time", context.preferred_time))
+                if not value
+            ]
+            state["agent_response"] = f"What {' and '.join(missing)} would work for you?"
+        context.state = ConversationState.COLLECTING_INFO
+        state["context"] = context
+        return state
+
     def _check_availability(self, state: BookingAgentState) -> BookingAgentState:
         context = state["context"]
+        today = _utc_now().date()
 
         if not context.preferred_date:
-            context.preferred_date = (datetime.now() + timedelta(days=1)).date()
+            context.preferred_date = today + timedelta(days=1)
+        elif context.preferred_date < today:
+            # A day that has passed, e.g. carried over from an earlier turn
+            context.preferred_date = today
 
         start_date = datetime.combine(context.preferred_date, datetime.min.time())
-        end_date = start_date + timedelta(days=self.lookahead_days)
+        # Slots nearest the requested time come first; without one, the
+        # earliest free time does
+        preferred_start = (
+            datetime.combine(context.preferred_date, context.preferred_time)
+            if context.preferred_time else None
+        )
 
         try:
-            availability = check_calendar_availability.run({
-                "start_date": start_date.isoformat(),
-                "end_date": end_date.isoformat(),
-                "duration_minutes": context.duration
-            })
+            availability = self._search_availability(context, start_date, preferred_start)
 
             context.suggested_slots = availability
             context.state = ConversationState.CHECKING_AVAILABILITY
@@ -478,6 +671,53 @@ class BookingAgent:
             state["agent_response"] = f"⚠️ Couldn't check availability: {str(e)}"
             return state
 
+    def _search_availability(
+        self,
+        context: ConversationContext,
+        start_date: datetime,
+        preferred_start: Optional[datetime]
+    ) -> List[Dict[str, Any]]:
+        """Search the preferred day, then double the window until there are
+        max_suggestions slots, the window reaches max_lookahead_days or the
+        turn's tool budget runs out.
+
+        Each round only searches the days the window grew by: windows end at
+        midnight and free time never spans days, so the rounds add up to one
+        search over the whole window while each day is fetched once.
+        """
+        budget = _turn_budget.get()
+        # Time already gone today is never offered. The search starts at the
+        # next step boundary so the current time does not become a slot start
+        now = _utc_now()
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        step = timedelta(minutes=self.slot_step_minutes)
+        not_before = midnight - ((midnight - now) // step) * step
+        slots: List[Dict[str, Any]] = []
+        searched_days, window_days = 0, 1
+
+        while True:
+            slots.extend(self._run_tool(check_calendar_availability, {
+                "start_date": max(start_date + timedelta(days=searched_days), not_before).isoformat(),
+                "end_date": (start_date + timedelta(days=window_days)).isoformat(),
+                "duration_minutes": context.duration,
+                "attendees": context.attendees,
+                "preferred_time": preferred_start.isoformat() if preferred_start else None,
+                "limit": self.max_suggestions
+            }))
+            searched_days = window_days
+            if (
+                len(slots) >= self.max_suggestions
+                or window_days >= self.max_lookahead_days
+                or (budget is not None and budget.remaining("tool") <= 0)
+            ):
+                break
+            window_days = min(window_days * 2, self.max_lookahead_days)
+
+        logger.info(f"Searched {searched_days} day(s) from {start_date.date()}, found {len(slots)} slot(s)")
+        if preferred_start:
+            slots.sort(key=lambda slot: abs(datetime.fromisoformat(slot["start"]) - preferred_start))
+        return slots[:self.max_suggestions]
+
     def _suggest_slots(self, state: BookingAgentState) -> BookingAgentState:
         context = state["context"]
         availability = state.get("availability", [])
@@ -502,19 +742,20 @@ class BookingAgent:
 
         return state
 
+    def _select_slot(self, user_message: str, slots: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Match a reply like "2" or "the 1st one" against the suggested slots"""
+        match = SLOT_CHOICE_PATTERN.match(user_message)
+        if not match:
+            return None
+        index = int(match.group("index")) if match.group("index") else ORDINALS[match.group("ordinal").lower()]
+        offered = slots[:self.max_suggestions]
+        return offered[index - 1] if 1 <= index <= len(offered) else None
+
     def _confirm_booking(self, state: BookingAgentState) -> BookingAgentState:
         context = state["context"]
-        user_message = state.get("user_message", "").lower()
-        availability = state.get("availability", [])
+        user_message = state.get("user_message", "")
         
-        selected_slot = None
-        for i, slot in enumerate(availability[:self.max_suggestions], 1):
-            if (str(i) in user_message or 
-                f"{i}st" in user_message or 
-                f"{i}nd" in user_message or 
-                f"{i}rd" in user_message):
-                selected_slot = slot
-                break
+        selected_slot = self._select_slot(user_message, context.suggested_slots)
 
         if selected_slot:
             start_time = datetime.fromisoformat(selected_slot["start"])
@@ -536,19 +777,20 @@ class BookingAgent:
 
     def _complete_booking(self, state: BookingAgentState) -> BookingAgentState:
         context = state["context"]
-        user_message = state.get("user_message", "").lower()
+        user_message = state.get("user_message", "")
         selected_slot = context.selected_slot
 
-        if selected_slot and ("yes" in user_message or "confirm" in user_message):
+        if selected_slot and confirmation_reply(user_message):
             try:
-                booking_result = book_calendar_slot.run({
+                booking_result = self._run_tool(book_calendar_slot, {
                     "title": context.meeting_title or "Meeting",
                     "start_time": selected_slot["start"],
                     "end_time": selected_slot["end"],
+                    "attendees": context.attendees,
                     "description": context.meeting_description or "Scheduled via booking assistant"
                 })
 
-                if booking_result.get("success"):
+                if booking_result.get("status") == "success":
                     response = "🎉 Booking confirmed!"
                     context.state = ConversationState.COMPLETED
                 else:
@@ -561,6 +803,13 @@ class BookingAgent:
             response = "No problem! Let me know if you'd like to try again."
             context.state = ConversationState.INITIAL
 
+        # The next request starts from a clean slate
+        context.preferred_date = None
+        context.preferred_time = None
+        context.attendees = []
+        context.suggested_slots = []
+        context.selected_slot = None
+
         state.update({
             "context": context,
             "agent_response": response
@@ -568,18 +817,105 @@ class BookingAgent:
 
         return state
 
+    def _resume_node(self, context: ConversationContext, user_message: str) -> Optional[str]:
+        """The waiting node this message answers, if any; anything else
+        starts a new run from understand_intent.
+
+        Read from the stored context rather than from the checkpoint: with
+        several workers sharing the session store, the worker handling this
+        turn may hold no checkpoint for the session, or a stale one from an
+        earlier turn it handled.
+        """
+        if context.state == ConversationState.CONFIRMING_BOOKING:
+            if context.selected_slot and confirmation_reply(user_message) is not None:
+                return "complete_booking"
+        elif context.state == ConversationState.COLLECTING_INFO:
+            if context.suggested_slots and self._select_slot(user_message, context.suggested_slots):
+                return "confirm_booking"
+        return None
+
     def _route_after_intent(self, state: BookingAgentState) -> str:
         context = state["context"]
-        extracted_info = state.get("extracted_info")
 
-        if context.state == ConversationState.CONFIRMING_BOOKING:
-            return "confirm_booking"
-        elif extracted_info and extracted_info.get("date") and extracted_info.get("time"):
+        # The context carries date and time mentioned in earlier turns too
+        if context.preferred_date and context.preferred_time:
             return "check_availability"
         else:
             return "need_more_info"
 
-    def process_message(self, user_message: str, session_id: str = "default") -> Dict[str, Any]:
+    def _load_context(self, session_id: str) -> ConversationContext:
+        session = get_session_store().get(session_id)
+        if session and session.get("context"):
+            try:
+                return ConversationContext.from_session_dict(session["context"])
+            except Exception:
+                logger.warning(f"Discarding unreadable context for session {session_id}", exc_info=True)
+        return ConversationContext(session_id=session_id)
+
+    def _save_context(self, context: ConversationContext) -> None:
+        get_session_store().set(context.session_id, {
+            "context": context.to_session_dict(),
+            "last_updated": datetime.now().isoformat()
+        })
+
+    def _run_graph(
+        self,
+        initial_state: Dict[str, Any],
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+        budget: Optional[TurnBudget] = None
+    ) -> Dict[str, Any]:
+        config = {
+            "recursion_limit": self.recursion_limit,
+            "configurable": {"thread_id": initial_state["session_id"]}
+        }
+        # Values from the previous turn stay in the checkpoint unless reset
+        turn_input = {"agent_response": "", "intent": None, "availability": [], "extracted_info": {}}
+        turn_input.update(initial_state)
+
+        resume_at = self._resume_node(initial_state["context"], initial_state["user_message"])
+        if resume_at:
+            # Recorded as the node that led to the interrupt, so its edge
+            # routes to the waiting node again with this turn's input. This
+            # also works when the checkpoint is missing or stale.
+            self.graph.update_state(config, turn_input, as_node=INTERRUPTED_AFTER[resume_at])
+            graph_input = None
+        else:
+            graph_input = turn_input
+
+        budget_token = _turn_budget.set(budget)
+        try:
+            if on_event is None:
+                return self.graph.invoke(graph_input, config=config)
+            return self._stream_graph(graph_input, config, on_event)
+        finally:
+            _turn_budget.reset(budget_token)
+
+    def _stream_graph(
+        self,
+        graph_input: Optional[Dict[str, Any]],
+        config: Dict[str, Any],
+        on_event: Callable[[Dict[str, Any]], None]
+    ) -> Dict[str, Any]:
+        sink_token = _event_sink.set(on_event)
+        try:
+            for update in self.graph.stream(graph_input, config=config, stream_mode="updates"):
+                for node in update:
+                    on_event({"type": "node", "node": node})
+        finally:
+            _event_sink.reset(sink_token)
+        return self.graph.get_state(config).values
+
+    def process_message(
+        self,
+        user_message: str,
+        session_id: str = "default",
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Run one conversation turn.
+
+        If on_event is given it receives {"type": "node"} events as graph
+        nodes finish and {"type": "token"} events as LLM tokens arrive.
+        """
         logger.info(f"Processing message for session {session_id}")
         
         if not user_message or not isinstance(user_message, str):
@@ -592,20 +928,24 @@ class BookingAgent:
         try:
             initial_state = {
                 "user_message": user_message,
-                "context": ConversationContext(session_id=session_id),
+                "context": self._load_context(session_id),
                 "session_id": session_id
             }
             
-            start_time = time.time()
-            result = self.graph.invoke(initial_state)
-            elapsed = time.time() - start_time
-            
-            logger.info(f"Completed processing in {elapsed:.2f}s")
+            budget = TurnBudget(self.max_llm_calls_per_turn, self.max_tool_calls_per_turn)
+            with trace_request() as trace:
+                result = self._run_graph(initial_state, on_event, budget)
+                self._save_context(result["context"])
+
+            logger.info(f"Completed processing in {trace.total_seconds:.2f}s")
             
             return {
                 "response": result.get("agent_response"),
                 "state": result.get("context").state.name if hasattr(result.get("context").state, 'name') else str(result.get("context").state),
-                "context": result.get("context")
+                "context": result.get("context"),
+                "intent": result.get("intent"),
+                "budget": budget.to_dict(),
+                "trace": trace.to_dict()
             }
         except Exception as e:
             logger.error(f"Error processing message: {str(e)}\n{traceback.format_exc()}")
@@ -615,4 +955,64 @@ class BookingAgent:
                 "context": None
             }
 
-booking_agent = BookingAgent()
\ No newline at end of file
+    async def aprocess_message(self, user_message: str, session_id: str = "default") -> Dict[str, Any]:
+        """Run process_message on the agent executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.process_message, user_message, session_id
+        )
+
+    async def astream_message(self, user_message: str, session_id: str = "default") -> AsyncIterator[Dict[str, Any]]:
+        """Yield node and token events for a turn, then a final "done" event"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def emit(event: Optional[Dict[str, Any]]) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        def run() -> None:
+            try:
+                result = self.process_message(user_message, session_id, on_event=emit)
+                emit({
+                    "type": "done",
+                    "response": result["response"],
+                    "state": result["state"],
+                    "intent": result.get("intent"),
+                    "budget": result.get("budget"),
+                    "trace": result.get("trace")
+                })
+            finally:
+                emit(None)
+
+        future = loop.run_in_executor(self.executor, run)
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            yield event
+        await future
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
+
+
+# The agent, and the LLM and calendar clients behind it, are built on the
+# first request rather than when this module is imported
+_booking_agent: LazySingleton[BookingAgent] = LazySingleton(BookingAgent)
+
+
+def get_booking_agent() -> BookingAgent:
+    return _booking_agent.get()
+
+
+def shutdown_booking_agent() -> None:
+    if _booking_agent.initialized:
+        _booking_agent.get().shutdown()
+        _booking_agent.reset()
+
+
+def __getattr__(name: str):
+    # Keeps `from app.agents.booking_agent import booking_agent` working
+    if name == "booking_agent":
+        return get_booking_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
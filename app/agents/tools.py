@@ -1,25 +1,32 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 
-from langchain.tools import BaseTool, tool
+from langchain.tools import BaseTool, StructuredTool
 from langchain.tools.base import ToolException
 
-from app.services.calendar_service import CalendarService
-from app.models.schemas import AvailabilitySlot, BookingRequest, CalendarEvent
+from app.services.calendar_service import CalendarService, get_calendar_service
+from app.models.schemas import AvailabilitySlot, BookingRequest
 
 
 class BookingTools:
     """A collection of tools for calendar booking operations."""
 
-    def __init__(self, calendar_service: CalendarService):
-        self.calendar_service = calendar_service
+    def __init__(self, calendar_service: Optional[CalendarService] = None):
+        self._calendar_service = calendar_service
+
+    @property
+    def calendar_service(self) -> CalendarService:
+        # Resolved on first use so building the tools needs no network
+        return self._calendar_service or get_calendar_service()
 
-    @tool
     def check_availability(
         self,
         start_date: str,
         end_date: str,
-        duration_minutes: int = 60
+        duration_minutes: int = 60,
+        attendees: Optional[List[str]] = None,
+        preferred_time: Optional[str] = None,
+        limit: int = 5
     ) -> List[Dict[str, Any]]:
         """Check available time slots between dates.
 
@@ -27,28 +34,33 @@ class BookingTools:
             start_date: Start date in YYYY-MM-DD format
             end_date: End date in YYYY-MM-DD format
             duration_minutes: Duration in minutes (default: 60)
+            attendees: Emails whose calendars must also be free
+            preferred_time: ISO date and time to rank slots by closeness to
+            limit: Most slots to return (default: 5)
 
         Returns:
-            List of available slots with start/end times
+            List of available slots with start/end times, closest to
+            preferred_time first when it is given
         """
         try:
             start_dt = datetime.fromisoformat(start_date)
             end_dt = datetime.fromisoformat(end_date)
+            preferred_dt = datetime.fromisoformat(preferred_time) if preferred_time else None
 
-            slots: List[Dict[str, datetime]] = self.calendar_service.find_available_slots(
-                start_dt, end_dt, duration_minutes
+            slots: List[AvailabilitySlot] = self.calendar_service.find_available_slots(
+                start_dt, end_dt, duration_minutes, attendees=attendees,
+                limit=limit, preferred_start=preferred_dt
             )
 
             return [{
-                "start": slot['start'].isoformat(),
-                "end": slot['end'].isoformat(),
+                "start": slot.start.isoformat(),
+                "end": slot.end.isoformat(),
                 "duration_minutes": duration_minutes
-            } for slot in slots[:5]]  # Return first 5 slots
+            } for slot in slots]
 
         except Exception as e:
             raise ToolException(f"Availability check failed: {str(e)}")
 
-    @tool
     def book_slot(
         self,
         title: str,
@@ -81,7 +93,20 @@ class BookingTools:
                 location=location
             )
 
+            if booking.attendees:
+                busy = self.calendar_service.get_busy_intervals(
+                    booking.attendees, booking.start_time, booking.end_time
+                )
+                conflicts = [
+                    email for email, intervals in busy.items()
+                    if any(start < booking.end_time and end > booking.start_time for start, end in intervals)
+                ]
+                if conflicts:
+                    raise ToolException(f"Attendees are busy at that time: {', '.join(conflicts)}")
+
             event_id = self.calendar_service.create_event(booking)
+            if not event_id:
+                raise ToolException("the calendar did not accept the event")
 
             return {
                 "status": "success",
@@ -93,31 +118,27 @@ class BookingTools:
         except Exception as e:
             raise ToolException(f"Booking failed: {str(e)}")
 
-    @tool
     def get_current_time(self) -> str:
         """Get current date and time in ISO format."""
         return datetime.now().isoformat()
 
     def get_tools(self) -> List[BaseTool]:
         """Get all tools as LangChain BaseTool instances."""
+        # Wrapping the bound methods keeps `self` out of the tool schemas
         return [
-            self.check_availability,
-            self.book_slot,
-            self.get_current_time
+            StructuredTool.from_function(self.check_availability),
+            StructuredTool.from_function(self.book_slot),
+            StructuredTool.from_function(self.get_current_time)
         ]
 
 
 # ✅ Add these lines to make the tools importable from other modules
 
-# Initialize CalendarService
-calendar_service = CalendarService()
-
-# Create an instance of BookingTools
-booking_tools = BookingTools(calendar_service)
-
-# Export individual tools
-check_calendar_availability = booking_tools.check_availability
-book_calendar_slot = booking_tools.book_slot
+# Create an instance of BookingTools; the calendar service is built on first use
+booking_tools = BookingTools()
 
 # Export list of all tools
 agent_tools = booking_tools.get_tools()
+
+# Export individual tools
+check_calendar_availability, book_calendar_slot, get_current_time = agent_tools
@@ -1,23 +1,49 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import uvicorn
 from datetime import datetime
+import json
 import traceback
 
 # Try both import styles for flexibility
 try:
-    from app.agents.booking_agent import booking_agent
+    from app.agents.booking_agent import get_booking_agent, shutdown_booking_agent
+    from app.services.session_store import get_session_store
+    from app.services.checkpoints import get_checkpointer
+    from app.services.calendar_service import get_calendar_service, warm_calendar_service
+    from app.models.schemas import BookingRequest
+    from app.utils.metrics import metrics
     from config.settings import settings
 except ModuleNotFoundError:
-    from agents.booking_agent import booking_agent
+    from agents.booking_agent import get_booking_agent, shutdown_booking_agent
+    from services.session_store import get_session_store
+    from services.checkpoints import get_checkpointer
+    from services.calendar_service import get_calendar_service, warm_calendar_service
+    from models.schemas import BookingRequest
+    from utils.metrics import metrics
     from config import settings
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Services are created on first use, so startup does no network I/O;
+    # the calendar client is warmed in the background so the first
+    # availability check does not pay for credentials and client setup
+    if getattr(settings, "calendar_warm_start", True):
+        asyncio.get_running_loop().run_in_executor(None, warm_calendar_service)
+    yield
+    shutdown_booking_agent()
+
 app = FastAPI(
     title="Calendar Booking Agent API",
     description="AI-powered calendar booking assistant",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -29,18 +55,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory session storage (replace with Redis/DB in production)
-sessions: Dict[str, Dict[str, Any]] = {}
-
 class ChatRequest(BaseModel):
     message: str
     session_id: str = "default"
+    # Return the per-request trace (node timings, LLM tokens, calendar
+    # calls, cache hits) in the response
+    debug: bool = False
 
 class ChatResponse(BaseModel):
     response: str
     session_id: str
     timestamp: str
     state: str
+    # How intent was extracted this turn ("parser" or "llm"), None when the
+    # turn skipped intent analysis
+    intent_source: Optional[str] = None
+    intent_confidence: Optional[float] = None
+    # LLM and tool calls made this turn against the per-turn limits
+    budget: Optional[Dict[str, int]] = None
+    debug: Optional[Dict[str, Any]] = None
+
+class BatchBookingRequest(BaseModel):
+    bookings: List[BookingRequest]
+
+class BookingResult(BaseModel):
+    index: int
+    success: bool
+    event_id: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchBookingResponse(BaseModel):
+    results: List[BookingResult]
+    created: int
+    failed: int
 
 @app.get("/")
 async def root():
@@ -50,48 +97,109 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     """Main chat endpoint for the booking agent"""
     try:
-        result = booking_agent.process_message(
+        result = await get_booking_agent().aprocess_message(
             user_message=request.message,
             session_id=request.session_id
         )
 
-        sessions[request.session_id] = {
-            "context": result.get("context"),
-            "last_updated": datetime.now().isoformat()
-        }
+        intent = result.get("intent") or {}
 
         return ChatResponse(
             response=result["response"],
             session_id=request.session_id,
             timestamp=datetime.now().isoformat(),
-            state=result["state"]
+            state=result["state"],
+            intent_source=intent.get("source"),
+            intent_confidence=intent.get("confidence"),
+            budget=result.get("budget"),
+            debug=result.get("trace") if request.debug else None
         )
 
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Stream graph progress and LLM tokens as server-sent events.
+
+    Emits {"type": "node"} and {"type": "token"} events while the turn
+    runs, then a single {"type": "done"} event with the final response.
+    """
+    async def event_source():
+        try:
+            async for event in get_booking_agent().astream_message(
+                user_message=request.message,
+                session_id=request.session_id
+            ):
+                if event["type"] == "done":
+                    event.update(session_id=request.session_id, timestamp=datetime.now().isoformat())
+                    if not request.debug:
+                        event.pop("trace", None)
+                yield f"data: {json.dumps(event, default=str)}\n\n"
+        except Exception as e:
+            traceback.print_exc()
+            error = {"type": "error", "message": f"Error processing message: {str(e)}"}
+            yield f"data: {json.dumps(error)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/bookings/batch", response_model=BatchBookingResponse)
+async def batch_bookings_endpoint(request: BatchBookingRequest):
+    """Create many events at once; failures are reported per booking"""
+    max_bookings = getattr(settings, "batch_booking_max", 500)
+    if len(request.bookings) > max_bookings:
+        raise HTTPException(status_code=413, detail=f"At most {max_bookings} bookings per request")
+
+    for index, booking in enumerate(request.bookings):
+        if booking.end_time <= booking.start_time:
+            raise HTTPException(status_code=422, detail=f"Booking {index} ends before it starts")
+
+    try:
+        results = await run_in_threadpool(get_calendar_service().create_events, request.bookings)
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error creating bookings: {str(e)}")
+
+    created = sum(1 for result in results if result["success"])
+    return BatchBookingResponse(
+        results=results,
+        created=created,
+        failed=len(results) - created
+    )
+
 @app.get("/sessions/{session_id}")
 async def get_session(session_id: str):
-    if session_id not in sessions:
+    session = get_session_store().get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    return sessions[session_id]
+    return session
 
 @app.delete("/sessions/{session_id}")
 async def clear_session(session_id: str):
-    if session_id in sessions:
-        del sessions[session_id]
+    get_checkpointer().delete_thread(session_id)
+    if get_session_store().delete(session_id):
         return {"message": "Session cleared"}
     else:
         raise HTTPException(status_code=404, detail="Session not found")
 
 @app.get("/sessions")
 async def list_sessions():
-    return {"sessions": list(sessions.keys()), "count": len(sessions)}
+    session_ids = get_session_store().list_sessions()
+    return {"sessions": session_ids, "count": len(session_ids)}
 
 if __name__ == "__main__":
     uvicorn.run(
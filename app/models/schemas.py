@@ -2,7 +2,7 @@ from pydantic import BaseModel, Field
 from datetime import datetime, date, time
 from typing import Optional, List, Dict, Any
 from enum import Enum
-from langchain.schema import BaseMessage
+from langchain.schema import BaseMessage, HumanMessage, AIMessage
 class EventStatus(str, Enum):
     CONFIRMED = "confirmed"
     TENTATIVE = "tentative"
@@ -98,12 +98,41 @@ class ConversationContext(BaseModel):
     preferred_date: Optional[date] = None
     preferred_time: Optional[time] = None
     duration: int = 60  # minutes
+    attendees: List[str] = []
     meeting_title: str = "Meeting"
     meeting_description: Optional[str] = None
-    suggested_slots: List[AvailabilitySlot] = []
-    selected_slot: Optional[AvailabilitySlot] = None
+    # Slots are kept in the booking tools' output format (ISO start/end strings)
+    suggested_slots: List[Dict[str, Any]] = []
+    selected_slot: Optional[Dict[str, Any]] = None
     conversation_history: List[BaseMessage] = []
     current_booking: Optional[BookingRequest] = None
 
+    def to_session_dict(self, history_limit: int = 10) -> Dict[str, Any]:
+        """Compact JSON-safe form for the session store"""
+        data = self.model_dump(
+            mode="json",
+            exclude={"conversation_history"},
+            exclude_defaults=True
+        )
+        data["session_id"] = self.session_id
+        data["conversation_history"] = [
+            {"role": message.type, "content": message.content}
+            for message in self.conversation_history[-history_limit:]
+        ]
+        return data
+
+    @classmethod
+    def from_session_dict(cls, data: Dict[str, Any]) -> "ConversationContext":
+        """Rebuild a context saved with to_session_dict"""
+        data = dict(data)
+        history = [
+            HumanMessage(content=item["content"]) if item.get("role") == "human"
+            else AIMessage(content=item["content"])
+            for item in data.pop("conversation_history", [])
+        ]
+        context = cls.model_validate(data)
+        context.conversation_history = history
+        return context
+
 
 
@@ -0,0 +1,111 @@
+import heapq
+from datetime import datetime, time, timedelta
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort busy intervals once and coalesce any that overlap or touch"""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def iter_free_slots(
+    busy: Sequence[Interval],
+    start: datetime,
+    end: datetime,
+    duration_minutes: int = 60,
+    working_hours_start: int = 9,
+    working_hours_end: int = 17,
+    skip_weekends: bool = True
+) -> Iterator[Interval]:
+    """Yield free gaps of at least duration_minutes inside working hours.
+
+    busy must be sorted and non-overlapping (see merge_intervals). A single
+    cursor walks it alongside the days of the window, so the cost is
+    O(days + intervals) however long the window is, and busy time spanning
+    midnight blocks both days it touches. Gaps are clipped to [start, end).
+    """
+    duration = timedelta(minutes=duration_minutes)
+    day_start_time = time(hour=working_hours_start)
+    day_end_time = time(hour=working_hours_end)
+    index = 0
+    current_date = start.date()
+
+    while current_date <= end.date():
+        if skip_weekends and current_date.weekday() >= 5:
+            current_date += timedelta(days=1)
+            continue
+
+        window_start = max(datetime.combine(current_date, day_start_time), start)
+        window_end = min(datetime.combine(current_date, day_end_time), end)
+        current_date += timedelta(days=1)
+        if window_end - window_start < duration:
+            continue
+
+        # Busy time that ended before this window can never matter again
+        while index < len(busy) and busy[index][1] <= window_start:
+            index += 1
+
+        cursor = window_start
+        position = index
+        while position < len(busy) and busy[position][0] < window_end:
+            busy_start, busy_end = busy[position]
+            if busy_start - cursor >= duration:
+                yield cursor, busy_start
+            cursor = max(cursor, busy_end)
+            position += 1
+
+        if window_end - cursor >= duration:
+            yield cursor, window_end
+
+
+def nearest_slots(
+    free: Iterable[Interval],
+    preferred: datetime,
+    duration_minutes: int = 60,
+    k: int = 5
+) -> List[Interval]:
+    """The k meeting-length slots starting closest to preferred, closest first.
+
+    free must be chronological, as iter_free_slots yields it. Each gap offers
+    the start nearest to preferred and up to k more either side of it, one
+    meeting length apart. The scan stops at the first gap that begins
+    further after preferred than the k-th best slot so far, so the work
+    depends on k and how close the free time is, not on the window length.
+    """
+    if k <= 0:
+        return []
+    duration = timedelta(minutes=duration_minutes)
+    # Max-heap of the best k as (-distance, -order, start); on equal
+    # distance the earlier slot is kept
+    best: List[Tuple[float, int, datetime]] = []
+    order = 0
+
+    for gap_start, gap_end in free:
+        if len(best) == k and (gap_start - preferred).total_seconds() >= -best[0][0]:
+            break
+        latest_start = gap_end - duration
+        nearest = min(max(preferred, gap_start), latest_start)
+        for step in range(-k, k + 1):
+            start = nearest + step * duration
+            if start < gap_start or start > latest_start:
+                continue
+            distance = abs((start - preferred).total_seconds())
+            order += 1
+            entry = (-distance, -order, start)
+            if len(best) < k:
+                heapq.heappush(best, entry)
+            elif entry > best[0]:
+                heapq.heapreplace(best, entry)
+
+    return [(start, start + duration) for _, _, start in sorted(best, reverse=True)]
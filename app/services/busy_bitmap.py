@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+from typing import Iterator, Sequence
+
+import numpy as np
+
+from app.services.availability import Interval
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class BusyBitmap:
+    """Busy time of one or more calendars as a (days, cells) boolean grid.
+
+    Each row is a calendar day from midnight of the origin and each cell
+    covers resolution_minutes. Busy intervals are rounded outwards to whole
+    cells, so a cell is only free when the whole cell is, and combining
+    calendars is a vectorized OR over grids of the same shape.
+    """
+
+    def __init__(self, origin: datetime, days: int, resolution_minutes: int = 5):
+        if MINUTES_PER_DAY % resolution_minutes:
+            raise ValueError("resolution_minutes must divide a day")
+        self.origin = datetime.combine(origin.date(), datetime.min.time())
+        self.days = days
+        self.resolution = resolution_minutes
+        self.cells_per_day = MINUTES_PER_DAY // resolution_minutes
+        self.busy = np.zeros((days, self.cells_per_day), dtype=bool)
+
+    @classmethod
+    def from_intervals(
+        cls,
+        intervals: Sequence[Interval],
+        origin: datetime,
+        days: int,
+        resolution_minutes: int = 5
+    ) -> "BusyBitmap":
+        bitmap = cls(origin, days, resolution_minutes)
+        bitmap.mark(intervals)
+        return bitmap
+
+    def _seconds(self, moments: Sequence[datetime]) -> np.ndarray:
+        # Much faster than letting NumPy convert datetime objects itself
+        origin = self.origin
+        return np.fromiter(
+            [(moment - origin).total_seconds() for moment in moments],
+            dtype=np.float64, count=len(moments)
+        )
+
+    def mark(self, intervals: Sequence[Interval]) -> None:
+        """Mark busy intervals, in any order and possibly overlapping"""
+        if not len(intervals):
+            return
+        bounds = self._seconds([moment for interval in intervals for moment in interval]).reshape(-1, 2)
+        cell = self.resolution * 60
+        total = self.busy.size
+        # Outwards to whole cells: starts round down, ends round up
+        starts = np.clip(np.floor(bounds[:, 0] / cell), 0, total).astype(np.int64)
+        ends = np.clip(np.ceil(bounds[:, 1] / cell), 0, total).astype(np.int64)
+        keep = ends > starts
+        # +1 where busy time starts and -1 where it ends; a running sum
+        # above zero is busy, in one pass however many intervals overlap
+        changes = (
+            np.bincount(starts[keep], minlength=total + 1)
+            - np.bincount(ends[keep], minlength=total + 1)
+        )
+        self.busy |= (np.cumsum(changes[:-1]) > 0).reshape(self.busy.shape)
+
+    def __or__(self, other: "BusyBitmap") -> "BusyBitmap":
+        if (self.origin, self.busy.shape) != (other.origin, other.busy.shape):
+            raise ValueError("Bitmaps cover different days or resolutions")
+        combined = BusyBitmap(self.origin, self.days, self.resolution)
+        np.logical_or(self.busy, other.busy, out=combined.busy)
+        return combined
+
+    def free_slots(
+        self,
+        start: datetime,
+        end: datetime,
+        duration_minutes: int = 60,
+        working_hours_start: int = 9,
+        working_hours_end: int = 17,
+        skip_weekends: bool = True
+    ) -> Iterator[Interval]:
+        """Yield free runs of at least duration_minutes inside working hours
+        and [start, end), chronologically, like iter_free_slots"""
+        cells = self.resolution
+        first = working_hours_start * 60 // cells
+        last = working_hours_end * 60 // cells
+        blocked = self.busy[:, first:last].copy()
+
+        if skip_weekends:
+            weekdays = (self.origin.weekday() + np.arange(self.days)) % 7
+            blocked[weekdays >= 5] = True
+
+        # Outside the window counts as busy, so a cell must lie wholly inside
+        cell_starts = (
+            np.arange(self.days)[:, None] * MINUTES_PER_DAY + np.arange(first, last)[None, :] * cells
+        ) * 60
+        window_start, window_end = self._seconds([start, end])
+        blocked |= (cell_starts < window_start) | (cell_starts + cells * 60 > window_end)
+
+        # Runs of free cells per day: pad each row with busy cells, then
+        # +1 in the difference is a run start and -1 a run end
+        free = np.pad(~blocked, ((0, 0), (1, 1))).astype(np.int8)
+        edges = np.diff(free, axis=1)
+        run_days, run_starts = np.nonzero(edges == 1)
+        _, run_ends = np.nonzero(edges == -1)
+        needed = -(-duration_minutes // cells)
+        long_enough = run_ends - run_starts >= needed
+
+        for day, run_start, run_end in zip(
+            run_days[long_enough], run_starts[long_enough], run_ends[long_enough]
+        ):
+            day_start = self.origin + timedelta(days=int(day))
+            yield (
+                day_start + timedelta(minutes=int(first + run_start) * cells),
+                day_start + timedelta(minutes=int(first + run_end) * cells)
+            )
+
+
+def iter_free_slots_bitmap(
+    calendars: Sequence[Sequence[Interval]],
+    start: datetime,
+    end: datetime,
+    duration_minutes: int = 60,
+    working_hours_start: int = 9,
+    working_hours_end: int = 17,
+    skip_weekends: bool = True,
+    resolution_minutes: int = 5
+) -> Iterator[Interval]:
+    """Free time common to every calendar's busy intervals, as gaps like
+    iter_free_slots yields, rounded to resolution_minutes"""
+    days = (end.date() - start.date()).days + 1
+    combined = BusyBitmap(start, days, resolution_minutes)
+    if calendars:
+        bitmaps = [
+            BusyBitmap.from_intervals(intervals, start, days, resolution_minutes).busy
+            for intervals in calendars
+        ]
+        np.logical_or.reduce(bitmaps, out=combined.busy)
+    return combined.free_slots(
+        start, end, duration_minutes, working_hours_start, working_hours_end, skip_weekends
+    )
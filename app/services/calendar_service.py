@@ -1,194 +1,403 @@
-import pickle
-import os
-from datetime import datetime , timedelta
-from typing import List, Optional
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+import threading
+import time
+from datetime import datetime , timezone
+from itertools import chain, islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
-from google_auth_oauthlib.flow import InstalledAppFlow
 from config.settings import settings
-import socket
 from app.models.schemas import CalendarEvent , BookingRequest , AvailabilitySlot
+from app.services.availability import Interval, merge_intervals, iter_free_slots, nearest_slots
+from app.services.busy_bitmap import iter_free_slots_bitmap
+from app.services.credentials import get_credential_manager, has_stored_token
+from app.services.event_cache import EventCache, CalendarEventCache
+from app.services.http_pool import HttpPool
+from app.utils.lazy import LazySingleton
+from app.utils.metrics import record_cache_lookup, record_calendar_call
 
-SCOPES = ['https://www.googleapis.com/auth/calendar']
+# Most calendars the freebusy endpoint accepts in one query
+FREEBUSY_MAX_CALENDARS = 50
+# Calls per batch HTTP request; Google advises keeping batches at or below 50
+EVENTS_BATCH_MAX = 50
+
+# The Calendar v3 discovery document bundled with google-api-python-client,
+# read once per process so building clients never fetches it
+_discovery_document: LazySingleton[Optional[str]] = LazySingleton(lambda: get_static_doc('calendar', 'v3'))
 
 class CalendarService():
     def __init__(self):
         self.service = None
+        # httplib2 clients are not thread-safe, so every API call borrows one
+        # from this pool; their keep-alive connections are reused
+        self.pool_size = getattr(settings, "calendar_pool_size", 8)
+        self.http_timeout = getattr(settings, "calendar_http_timeout_seconds", 30)
+        self._http_pool: Optional[HttpPool] = None
+        self.event_cache = EventCache()
+        self.sync_interval = getattr(settings, "calendar_sync_interval_seconds", 30)
+        # "intervals" merges busy time exactly; "bitmap" intersects per-calendar
+        # NumPy grids, faster with many attendees over long windows but
+        # rounded outwards to the grid resolution
+        self.availability_engine = getattr(settings, "availability_engine", "intervals")
+        self.bitmap_resolution = getattr(settings, "availability_bitmap_resolution_minutes", 5)
         self.authenticate()
     
     def authenticate(self):
-        """Authenticate with Google Calendar API"""
-        creds = None
-        token_path = 'token.pickle'
+        """Build the Calendar client on the process-wide credentials, which
+        are kept fresh in the background. An expired stored token is
+        refreshed by the background thread first, rather than by whichever
+        request happens to use the client."""
+        manager = get_credential_manager()
+        if not manager.wait_until_ready(getattr(settings, "google_token_ready_timeout_seconds", 30)):
+            print("⚠️ Google token not refreshed yet; requests may refresh it themselves.")
+        creds = manager.credentials
 
-        # Wait for network
-        def wait_for_internet(host="www.googleapis.com", timeout=3):
-            while True:
-                try:
-                    socket.gethostbyname(host)
-                    print("✅ Internet is available.")
-                    return
-                except:
-                    print("🌐 Waiting for internet connection...")
-                    time.sleep(timeout)
-
-        wait_for_internet()
-        
-        if os.path.exists(token_path):
-            with open(token_path, 'rb') as token:
-                creds = pickle.load(token)
+        document = _discovery_document.get()
+        if document:
+            self.service = build_from_document(document, credentials=creds)
+        else:
+            self.service = build('calendar', 'v3', credentials=creds, static_discovery=True)
+
+        self._http_pool = HttpPool(
+            lambda: AuthorizedHttp(creds, http=httplib2.Http(timeout=self.http_timeout)),
+            size=self.pool_size
+        )
+
+    def _execute(self, request, method: str):
+        """Run one API request (or batch) on a pooled HTTP client, recording
+        it in the metrics"""
+        started = time.perf_counter()
+        try:
+            with self._http_pool.connection() as http:
+                return request.execute(http=http)
+        finally:
+            record_calendar_call(method, time.perf_counter() - started)
+    
+    def _to_rfc3339(self, dt: datetime) -> str:
+        """Format a datetime for the API; naive values are treated as UTC"""
+        if dt.tzinfo is None:
+            return dt.isoformat() + 'Z'
+        return dt.astimezone(timezone.utc).isoformat()
+
+    def _parse_datetime(self, value: str) -> datetime:
+        """Parse an API timestamp into naive UTC, the form used throughout the
+        service"""
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(timezone.utc).replace(tzinfo=None)
+
+    def _parse_event(self, event: dict) -> Optional[CalendarEvent]:
+        """Convert an API event resource, skipping all-day and cancelled events"""
+        if event.get('status') == 'cancelled':
+            return None
+
+        start = event['start'].get('dateTime', event['start'].get('date'))
+        end = event['end'].get('dateTime', event['end'].get('date'))
         
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                for attempt in range(3):  # Retry 3 times
-                    try:
-                        creds.refresh(Request())
-                        print("✅ Token refreshed successfully.")
-                        break
-                    except Exception as e:
-                        print(f"⚠️ Attempt {attempt+1} failed to refresh token: {e}")
-                        time.sleep(2 ** attempt)
-                else:
-                    raise ConnectionError("❌ Could not refresh Google credentials after 3 attempts.")
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    settings.google_credentials_path, SCOPES)
-                creds = flow.run_local_server(port=0)
-            
-            with open(token_path, 'wb') as token:
-                pickle.dump(creds, token)
+        if 'T' not in start:  # date format
+            return None  # Skip all-day events
+
+        start_dt = self._parse_datetime(start)
+        end_dt = self._parse_datetime(end)
         
-        self.service = build('calendar', 'v3', credentials=creds)
-    
-    def get_events(self, start_date: datetime, end_date: datetime) -> List[CalendarEvent]:
-        """Get events from calendar within date range"""
-        try:
-            events_result = self.service.events().list(
-                calendarId=settings.google_calendar_id,
-                timeMin=start_date.isoformat() + 'Z',
-                timeMax=end_date.isoformat() + 'Z',
+        return CalendarEvent(
+            id=event['id'],
+            title=event.get('summary', 'No Title'),
+            start_time=start_dt,
+            end_time=end_dt,
+            description=event.get('description'),
+            location=event.get('location')
+        )
+
+    def _apply_event(self, cache: CalendarEventCache, event: dict) -> None:
+        parsed = self._parse_event(event)
+        if parsed:
+            cache.upsert(parsed)
+        else:
+            cache.remove(event['id'])
+
+    def _list_events(self, method: str, **params) -> Tuple[List[dict], Optional[str]]:
+        """Page through events.list, returning the items and the
+        nextSyncToken. Touches no cache state, so no lock is needed."""
+        items: List[dict] = []
+        page_token = None
+        while True:
+            events_result = self._execute(self.service.events().list(
                 singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
-            calendar_events = []
-            
-            for event in events:
-                start = event['start'].get('dateTime', event['start'].get('date'))
-                end = event['end'].get('dateTime', event['end'].get('date'))
-                
-                if 'T' in start:  # datetime format
-                    start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
-                    end_dt = datetime.fromisoformat(end.replace('Z', '+00:00'))
-                else:  # date format
-                    continue  # Skip all-day events
-                
-                calendar_events.append(CalendarEvent(
-                    id=event['id'],
-                    title=event.get('summary', 'No Title'),
-                    start=start_dt,
-                    end=end_dt,
-                    description=event.get('description'),
-                    location=event.get('location')
-                ))
-            
-            return calendar_events
-        
-        except HttpError as error:
-            print(f'An error occurred: {error}')
-            return []
+                maxResults=2500,
+                pageToken=page_token,
+                **params
+            ), method)
+            items.extend(events_result.get('items', []))
+
+            page_token = events_result.get('nextPageToken')
+            if not page_token:
+                return items, events_result.get('nextSyncToken')
+
+    def _fetch_range(
+        self,
+        calendar_id: str,
+        cache: CalendarEventCache,
+        claim: Tuple[datetime, datetime, threading.Event]
+    ) -> None:
+        """List every event in a claimed range into the cache"""
+        start_date, end_date, _ = claim
+        try:
+            items, sync_token = self._list_events(
+                'events.list',
+                calendarId=calendar_id,
+                timeMin=self._to_rfc3339(start_date),
+                timeMax=self._to_rfc3339(end_date)
+            )
+            with cache.lock:
+                for event in items:
+                    self._apply_event(cache, event)
+                if cache.sync_token is None:
+                    cache.sync_token = sync_token
+                    cache.last_sync = time.monotonic()
+                cache.mark_covered(start_date, end_date)
+        finally:
+            with cache.lock:
+                cache.release(claim)
+
+    def _sync_cache(self, calendar_id: str, cache: CalendarEventCache) -> None:
+        """Pull changes made since the last sync using the stored sync token.
+        One request syncs at a time; the others keep using the cache."""
+        with cache.lock:
+            if (cache.sync_token is None or cache.syncing
+                    or time.monotonic() - cache.last_sync < self.sync_interval):
+                return
+            cache.syncing = True
+            sync_token = cache.sync_token
+
+        try:
+            items, next_sync_token = self._list_events(
+                'events.sync', calendarId=calendar_id, syncToken=sync_token
+            )
+        except Exception as error:
+            if isinstance(error, HttpError) and error.resp.status == 410:
+                # Sync token expired; drop the cache and relist on demand
+                with cache.lock:
+                    cache.clear()
+                return
+            # Rate limits, server errors and timeouts leave the cached events
+            # as valid as they were; keep serving them and retry after the
+            # next sync interval
+            print(f'⚠️ Calendar sync failed, serving cached events: {error}')
+            with cache.lock:
+                cache.last_sync = time.monotonic()
+            return
+        finally:
+            with cache.lock:
+                cache.syncing = False
+
+        with cache.lock:
+            if cache.sync_token != sync_token:
+                # Cleared while we were listing
+                return
+            for event in items:
+                self._apply_event(cache, event)
+            cache.sync_token = next_sync_token or sync_token
+            cache.last_sync = time.monotonic()
+
+    def get_events(self, start_date: datetime, end_date: datetime) -> List[CalendarEvent]:
+        """Get events from calendar within date range.
+
+        Served from the local event cache; only ranges never fetched before
+        hit the API, and the cache is refreshed with incremental sync at
+        most once per sync interval. API calls run outside the cache lock,
+        so requests for one calendar only wait on each other when they need
+        the same unfetched range.
+
+        A failed sync falls back to the cached events. A range that was
+        never fetched and cannot be raises the API error: an empty list
+        would make the whole calendar look free.
+        """
+        calendar_id = settings.google_calendar_id
+        cache = self.event_cache.for_calendar(calendar_id)
+
+        self._sync_cache(calendar_id, cache)
+        hit = True
+        while True:
+            with cache.lock:
+                claims, waiting = cache.claim_missing(start_date, end_date)
+            if not claims and not waiting:
+                break
+            hit = False
+            for position, claim in enumerate(claims):
+                try:
+                    self._fetch_range(calendar_id, cache, claim)
+                except Exception:
+                    # Hand back the ranges not fetched yet so requests
+                    # waiting on them claim them instead of timing out
+                    with cache.lock:
+                        for unfetched in claims[position + 1:]:
+                            cache.release(unfetched)
+                    raise
+            # A failed fetch elsewhere leaves its range missing, so the
+            # next pass claims it
+            for done in waiting:
+                done.wait(self.http_timeout)
+        record_cache_lookup('calendar_events', hit=hit)
+
+        with cache.lock:
+            return cache.events_between(start_date, end_date)
     
+    def get_busy_intervals(
+        self,
+        calendar_ids: List[str],
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[str, List[Interval]]:
+        """Busy time for several calendars from a single freebusy query
+        (one query per FREEBUSY_MAX_CALENDARS calendars).
+
+        Calendars the API reports errors for are left out. A query that
+        fails as a whole raises, since treating its calendars as free would
+        let bookings land on busy attendees.
+        """
+        busy: Dict[str, List[Interval]] = {}
+
+        for offset in range(0, len(calendar_ids), FREEBUSY_MAX_CALENDARS):
+            chunk = calendar_ids[offset:offset + FREEBUSY_MAX_CALENDARS]
+            result = self._execute(self.service.freebusy().query(body={
+                'timeMin': self._to_rfc3339(start_date),
+                'timeMax': self._to_rfc3339(end_date),
+                'items': [{'id': calendar_id} for calendar_id in chunk]
+            }), 'freebusy.query')
+
+            for calendar_id, calendar in result.get('calendars', {}).items():
+                if calendar.get('errors'):
+                    # Usually a calendar we are not allowed to see
+                    print(f"⚠️ Free/busy unavailable for {calendar_id}: {calendar['errors']}")
+                    continue
+                busy[calendar_id] = [
+                    (self._parse_datetime(period['start']), self._parse_datetime(period['end']))
+                    for period in calendar.get('busy', [])
+                ]
+
+        return busy
+
+    def _iter_free_intervals(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        duration_minutes: int,
+        working_hours_start: int,
+        working_hours_end: int,
+        attendees: Optional[List[str]]
+    ) -> Iterator[Interval]:
+        # Get existing events
+        existing_events = self.get_events(start_date, end_date)
+        calendars = [[(event.start_time, event.end_time) for event in existing_events]]
+
+        if attendees:
+            calendars.extend(self.get_busy_intervals(attendees, start_date, end_date).values())
+
+        if self.availability_engine == "bitmap":
+            return iter_free_slots_bitmap(
+                calendars, start_date, end_date, duration_minutes,
+                working_hours_start, working_hours_end,
+                resolution_minutes=self.bitmap_resolution
+            )
+        return iter_free_slots(
+            merge_intervals(chain.from_iterable(calendars)), start_date, end_date, duration_minutes,
+            working_hours_start, working_hours_end
+        )
+
+    @staticmethod
+    def _to_slot(interval: Interval) -> AvailabilitySlot:
+        slot_start, slot_end = interval
+        return AvailabilitySlot(
+            start=slot_start,
+            end=slot_end,
+            duration_minutes=int((slot_end - slot_start).total_seconds() / 60)
+        )
+
+    def iter_available_slots(
+        self, 
+        start_date: datetime, 
+        end_date: datetime, 
+        duration_minutes: int = 60,
+        working_hours_start: int = 9,
+        working_hours_end: int = 17,
+        attendees: Optional[List[str]] = None
+    ) -> Iterator[AvailabilitySlot]:
+        """Lazily yield available time slots in chronological order.
+
+        With attendees, a slot must also be free on each attendee's
+        calendar as reported by the freebusy API.
+        """
+        for interval in self._iter_free_intervals(
+            start_date, end_date, duration_minutes,
+            working_hours_start, working_hours_end, attendees
+        ):
+            yield self._to_slot(interval)
+
     def find_available_slots(
         self, 
         start_date: datetime, 
         end_date: datetime, 
         duration_minutes: int = 60,
         working_hours_start: int = 9,
-        working_hours_end: int = 17
+        working_hours_end: int = 17,
+        attendees: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        preferred_start: Optional[datetime] = None
     ) -> List[AvailabilitySlot]:
-        """Find available time slots"""
-        
-        # Get existing events
-        existing_events = self.get_events(start_date, end_date)
-        
-        available_slots = []
-        current_date = start_date.date()
-        end_date_only = end_date.date()
-        
-        while current_date <= end_date_only:
-            # Skip weekends
-            if current_date.weekday() >= 5:
-                current_date += timedelta(days=1)
-                continue
-            
-            # Create working hours for this day
-            day_start = datetime.combine(current_date, datetime.min.time().replace(hour=working_hours_start))
-            day_end = datetime.combine(current_date, datetime.min.time().replace(hour=working_hours_end))
-            
-            # Get events for this day
-            day_events = [
-                event for event in existing_events 
-                if event.start.date() == current_date
-            ]
-            
-            # Sort events by start time
-            day_events.sort(key=lambda x: x.start)
-            
-            # Find gaps between events
-            current_time = day_start
-            
-            for event in day_events:
-                # Check if there's a gap before this event
-                if (event.start - current_time).total_seconds() >= duration_minutes * 60:
-                    available_slots.append(AvailabilitySlot(
-                        start=current_time,
-                        end=event.start,
-                        duration_minutes=int((event.start - current_time).total_seconds() / 60)
-                    ))
-                
-                current_time = max(current_time, event.end)
-            
-            # Check for availability after the last event
-            if (day_end - current_time).total_seconds() >= duration_minutes * 60:
-                available_slots.append(AvailabilitySlot(
-                    start=current_time,
-                    end=day_end,
-                    duration_minutes=int((day_end - current_time).total_seconds() / 60)
-                ))
-            
-            current_date += timedelta(days=1)
-        
-        return available_slots
+        """Find available time slots.
+
+        By default these are the free gaps in chronological order, stopping
+        after limit of them. With preferred_start they are the limit (default
+        5) meeting-length slots starting closest to it, closest first.
+        """
+        free = self._iter_free_intervals(
+            start_date, end_date, duration_minutes,
+            working_hours_start, working_hours_end, attendees
+        )
+        if preferred_start is not None:
+            intervals = nearest_slots(free, preferred_start, duration_minutes, limit or 5)
+        else:
+            intervals = islice(free, limit)
+        return [self._to_slot(interval) for interval in intervals]
     
+    def _event_body(self, booking: BookingRequest) -> dict:
+        event = {
+            'summary': booking.title,
+            'description': booking.description,
+            'start': {
+                'dateTime': booking.start_time.isoformat(),
+                'timeZone': 'UTC',
+            },
+            'end': {
+                'dateTime': booking.end_time.isoformat(),
+                'timeZone': 'UTC',
+            },
+        }
+
+        if booking.location:
+            event['location'] = booking.location
+
+        if booking.attendees:
+            event['attendees'] = [{'email': email} for email in booking.attendees]
+
+        return event
+
     def create_event(self, booking: BookingRequest) -> Optional[str]:
         """Create a calendar event"""
         try:
-            event = {
-                'summary': booking.title,
-                'description': booking.description,
-                'start': {
-                    'dateTime': booking.start_time.isoformat(),
-                    'timeZone': 'UTC',
-                },
-                'end': {
-                    'dateTime': booking.end_time.isoformat(),
-                    'timeZone': 'UTC',
-                },
-            }
-            
-            if booking.location:
-                event['location'] = booking.location
+            event = self._event_body(booking)
             
-            if booking.attendees:
-                event['attendees'] = [{'email': email} for email in booking.attendees]
-            
-            created_event = self.service.events().insert(
+            created_event = self._execute(self.service.events().insert(
                 calendarId=settings.google_calendar_id, 
                 body=event
-            ).execute()
+            ), 'events.insert')
+
+            # Write-through so the new booking is visible to the next
+            # availability check without waiting for a sync
+            cache = self.event_cache.for_calendar(settings.google_calendar_id)
+            with cache.lock:
+                self._apply_event(cache, created_event)
             
             return created_event.get('id')
         
@@ -196,5 +405,80 @@ class CalendarService():
             print(f'An error occurred: {error}')
             return None
 
-# Global instance
-calendar_service = CalendarService()
+    def create_events(self, bookings: List[BookingRequest]) -> List[Dict[str, Any]]:
+        """Create many calendar events with batch HTTP requests.
+
+        Inserts are grouped EVENTS_BATCH_MAX at a time into one round-trip
+        each. Returns one result per booking, in input order, with
+        success, event_id and error set, so a partial failure only
+        affects the items that failed.
+        """
+        results: List[Dict[str, Any]] = [
+            {'index': index, 'success': False, 'event_id': None, 'error': None}
+            for index in range(len(bookings))
+        ]
+        cache = self.event_cache.for_calendar(settings.google_calendar_id)
+
+        def on_response(request_id: str, response: Optional[dict], exception: Optional[Exception]) -> None:
+            result = results[int(request_id)]
+            if exception is not None:
+                result['error'] = getattr(exception, 'reason', None) or str(exception)
+                return
+            result['success'] = True
+            result['event_id'] = response.get('id')
+            with cache.lock:
+                self._apply_event(cache, response)
+
+        for offset in range(0, len(bookings), EVENTS_BATCH_MAX):
+            chunk = bookings[offset:offset + EVENTS_BATCH_MAX]
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for index, booking in enumerate(chunk, start=offset):
+                batch.add(
+                    self.service.events().insert(
+                        calendarId=settings.google_calendar_id,
+                        body=self._event_body(booking)
+                    ),
+                    request_id=str(index)
+                )
+
+            try:
+                self._execute(batch, 'events.batch_insert')
+            except Exception as error:
+                # The whole round-trip failed (HTTP error, timeout, dropped
+                # connection); items the callback never saw are reported with
+                # that error and later chunks still run, so the caller always
+                # gets a result per item instead of retrying the whole batch
+                print(f'An error occurred: {error}')
+                for result in results[offset:offset + len(chunk)]:
+                    if not result['success'] and result['error'] is None:
+                        result['error'] = str(error)
+
+        return results
+
+# Shared instance, built on first use so importing this module stays offline
+_calendar_service: LazySingleton[CalendarService] = LazySingleton(CalendarService)
+
+def get_calendar_service() -> CalendarService:
+    return _calendar_service.get()
+
+def warm_calendar_service() -> None:
+    """Load credentials and build the shared client ahead of the first
+    request. Skipped when there is no stored token, since the interactive
+    OAuth flow must not start from a background thread."""
+    if _calendar_service.initialized or not has_stored_token():
+        return
+    try:
+        get_calendar_service()
+        print("✅ Calendar client ready.")
+    except Exception as e:
+        print(f"⚠️ Calendar warm-up failed, will retry on first use: {e}")
+
+def set_calendar_service(service: CalendarService) -> None:
+    """Replace the shared instance, e.g. with an offline fake"""
+    _calendar_service.set(service)
+
+def __getattr__(name: str):
+    # Keeps `from app.services.calendar_service import calendar_service` working
+    if name == "calendar_service":
+        return get_calendar_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
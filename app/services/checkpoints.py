@@ -0,0 +1,196 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time
+from typing import Iterator, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.serde.jsonplus import JsonPlusSerializer
+from config.settings import settings
+from app.models.schemas import ConversationContext
+from app.utils.lazy import LazySingleton
+
+# Agent graph checkpoints, one thread per chat session. A turn only ever
+# resumes from its session's newest checkpoint, so the savers drop older
+# ones instead of keeping the full history LangGraph records by default.
+
+
+class CheckpointSerializer(JsonPlusSerializer):
+    """JSON checkpoints that store the conversation context in the same
+    compact form as the session store, plus the parser's dates and times"""
+
+    def _default(self, obj):
+        if isinstance(obj, ConversationContext):
+            return self._encode_constructor_args(
+                ConversationContext, method="from_session_dict", args=[obj.to_session_dict()]
+            )
+        if isinstance(obj, (date, time)) and not isinstance(obj, datetime):
+            return self._encode_constructor_args(type(obj), method="fromisoformat", args=[obj.isoformat()])
+        return super()._default(obj)
+
+
+class SessionMemorySaver(MemorySaver):
+    """In-process checkpoints for the most recently active sessions.
+
+    Reads and writes share one lock, so a read never sees a session between
+    its old checkpoint being dropped and the new one being stored.
+    """
+
+    def __init__(self, max_sessions: int = 10000):
+        super().__init__(serde=CheckpointSerializer())
+        self.max_sessions = max_sessions
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            saved = super().put(config, checkpoint, metadata)
+            # Swap in a dict holding only the new checkpoint
+            self.storage[thread_id] = {checkpoint["id"]: self.storage[thread_id][checkpoint["id"]]}
+            self._recent[thread_id] = None
+            self._recent.move_to_end(thread_id)
+            while len(self._recent) > self.max_sessions:
+                oldest, _ = self._recent.popitem(last=False)
+                self.storage.pop(oldest, None)
+        return saved
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            if thread_id not in self.storage:
+                # storage is a defaultdict; looking up an unknown session
+                # would add an entry the LRU never evicts
+                return None
+            return super().get_tuple(config)
+
+    def list(
+        self,
+        config: RunnableConfig,
+        *,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            if config["configurable"]["thread_id"] not in self.storage:
+                return iter(())
+            return iter(list(super().list(config, before=before, limit=limit)))
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._recent.pop(thread_id, None)
+            self.storage.pop(thread_id, None)
+
+
+class SessionSqliteSaver(SqliteSaver):
+    """Checkpoints in SQLite, so a session resumes across restarts.
+
+    Every thread shares one connection, so reads take the saver's lock as
+    well as writes. A put stores the new checkpoint and drops the session's
+    older ones in a single transaction. Checkpoints expire ttl_seconds
+    after their session's last write, like SQLiteSessionStore entries, and
+    expired ones are purged on the next put.
+    """
+
+    def __init__(self, db_path: str = "checkpoints.db", ttl_seconds: Optional[float] = 3600):
+        super().__init__(sqlite3.connect(db_path, check_same_thread=False), serde=CheckpointSerializer())
+        self.ttl_seconds = ttl_seconds
+        # Create the table now rather than racing to on first use
+        self.setup()
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        # Databases written before checkpoints expired lack the column
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(checkpoints)")}
+        if "expires_at" not in columns:
+            self.conn.execute("ALTER TABLE checkpoints ADD COLUMN expires_at REAL")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_checkpoints_expires ON checkpoints (expires_at)")
+        self.conn.commit()
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        with self.lock:
+            return super().get_tuple(config)
+
+    def list(
+        self,
+        config: RunnableConfig,
+        *,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[CheckpointTuple]:
+        # Read everything while holding the lock; the base class streams
+        # rows from a cursor on the shared connection
+        with self.lock:
+            return iter(list(super().list(config, before=before, limit=limit)))
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata
+    ) -> RunnableConfig:
+        thread_id = str(config["configurable"]["thread_id"])
+        now = datetime.now().timestamp()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self.lock, self.cursor() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(thread_id, thread_ts, parent_ts, checkpoint, metadata, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint["id"],
+                    config["configurable"].get("thread_ts"),
+                    self.serde.dumps(checkpoint),
+                    self.serde.dumps(metadata),
+                    expires_at
+                )
+            )
+            # Checkpoint ids sort by creation time; only older ones go, so
+            # a newer checkpoint written concurrently is never removed
+            cur.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND thread_ts < ?",
+                (thread_id, checkpoint["id"])
+            )
+            cur.execute("DELETE FROM checkpoints WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        return {"configurable": {"thread_id": config["configurable"]["thread_id"], "thread_ts": checkpoint["id"]}}
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.lock, self.cursor() as cur:
+            cur.execute("DELETE FROM checkpoints WHERE thread_id = ?", (str(thread_id),))
+
+
+def create_checkpointer() -> BaseCheckpointSaver:
+    """Build the checkpoint saver configured in settings. Unless set, the
+    backend follows session_backend, so workers sharing sessions also
+    share checkpoints."""
+    backend = getattr(settings, "checkpoint_backend", None) or getattr(settings, "session_backend", "memory")
+
+    if backend == "sqlite":
+        return SessionSqliteSaver(
+            getattr(settings, "checkpoint_db_path", "checkpoints.db"),
+            ttl_seconds=getattr(settings, "session_ttl_seconds", 3600)
+        )
+    if backend == "memory":
+        return SessionMemorySaver(max_sessions=getattr(settings, "session_max_entries", 10000))
+    raise ValueError(f"Unknown checkpoint backend: {backend}")
+
+
+# Shared instance, built on first use
+_checkpointer: LazySingleton[BaseCheckpointSaver] = LazySingleton(create_checkpointer)
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    return _checkpointer.get()
+
+def set_checkpointer(checkpointer: BaseCheckpointSaver) -> None:
+    _checkpointer.set(checkpointer)
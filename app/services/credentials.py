@@ -0,0 +1,189 @@
+import json
+import os
+import pickle
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: workers do not coordinate refreshes
+    fcntl = None
+
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from config.settings import settings
+from app.utils.lazy import LazySingleton
+
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+
+# Token file written by earlier versions; migrated to JSON on first load
+LEGACY_TOKEN_PATH = "token.pickle"
+
+
+def token_path() -> str:
+    return getattr(settings, "google_token_path", "token.json")
+
+
+def has_stored_token() -> bool:
+    return os.path.exists(token_path()) or os.path.exists(LEGACY_TOKEN_PATH)
+
+
+class CredentialManager:
+    """Google OAuth credentials, loaded once per process and kept fresh.
+
+    A daemon thread refreshes the access token refresh_margin seconds before
+    it expires, retrying with exponential backoff, so request threads never
+    refresh or sleep. Every client shares the one Credentials object, which
+    is refreshed in place.
+
+    The token is stored as JSON. Workers sharing the file take an exclusive
+    lock to refresh, and adopt the token on disk when another worker already
+    refreshed it, so one refresh serves every process.
+
+    A stored token that has already expired is refreshed by the thread at
+    once, and wait_until_ready blocks until then; the Calendar client waits
+    on it when it is built, so the first requests do not refresh
+    themselves. If background refreshes keep failing past expiry,
+    google-auth's AuthorizedHttp still refreshes on the request path as a
+    last resort.
+    """
+
+    def __init__(self):
+        self.token_path = token_path()
+        self.refresh_margin = timedelta(seconds=getattr(settings, "google_token_refresh_margin_seconds", 300))
+        self.retry_interval = getattr(settings, "google_token_retry_seconds", 5)
+        self.max_retry_interval = getattr(settings, "google_token_max_retry_seconds", 300)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self.credentials: Credentials = self._load()
+        if self.credentials.valid:
+            self._ready.set()
+        self._thread = threading.Thread(target=self._refresh_loop, name="google-token-refresh", daemon=True)
+        self._thread.start()
+
+    def _load(self) -> Credentials:
+        creds = self._read()
+        if creds is None and os.path.exists(LEGACY_TOKEN_PATH):
+            with open(LEGACY_TOKEN_PATH, 'rb') as token:
+                creds = pickle.load(token)
+            self._write(creds)
+            print(f"✅ Migrated {LEGACY_TOKEN_PATH} to {self.token_path}.")
+
+        if creds is None or not creds.refresh_token:
+            # No usable token: the one-off interactive consent flow
+            flow = InstalledAppFlow.from_client_secrets_file(
+                settings.google_credentials_path, SCOPES)
+            creds = flow.run_local_server(port=0)
+            self._write(creds)
+
+        # An expired token is left to the refresh thread, which starts at once
+        return creds
+
+    def _read(self) -> Optional[Credentials]:
+        try:
+            with open(self.token_path, 'r') as token:
+                return Credentials.from_authorized_user_info(json.load(token), SCOPES)
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError) as e:
+            print(f"⚠️ Ignoring unreadable token file {self.token_path}: {e}")
+            return None
+
+    def _write(self, creds: Credentials) -> None:
+        # Write a temporary file and rename it over the token, so readers
+        # in other workers never see a partial file
+        directory = os.path.dirname(os.path.abspath(self.token_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".token-", suffix=".json")
+        try:
+            with os.fdopen(fd, 'w') as token:
+                token.write(creds.to_json())
+            os.chmod(temp_path, 0o600)
+            os.replace(temp_path, self.token_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(self.token_path + ".lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _needs_refresh(self, creds: Credentials) -> bool:
+        if creds.expiry is None:
+            return not creds.valid
+        # google-auth keeps expiry as naive UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return creds.expiry - self.refresh_margin <= now
+
+    def seconds_until_refresh(self) -> float:
+        expiry = self.credentials.expiry
+        if expiry is None:
+            # No expiry known; look again later
+            return 3600.0
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return max((expiry - self.refresh_margin - now).total_seconds(), 0.0)
+
+    def refresh(self) -> bool:
+        with self._lock, self._file_lock():
+            try:
+                stored = self._read()
+                if stored is not None and not self._needs_refresh(stored):
+                    # Another worker refreshed while we waited for the lock
+                    self._adopt(stored)
+                    self._ready.set()
+                    return True
+                self.credentials.refresh(Request())
+                self._write(self.credentials)
+                self._ready.set()
+                print("✅ Google token refreshed ahead of expiry.")
+                return True
+            except Exception as e:
+                print(f"⚠️ Background token refresh failed: {e}")
+                return False
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the credentials hold a valid access token. False if
+        the first refresh has not succeeded within timeout."""
+        return self._ready.wait(timeout)
+
+    def _adopt(self, stored: Credentials) -> None:
+        # Update in place so clients built on self.credentials see it
+        self.credentials.token = stored.token
+        self.credentials.expiry = stored.expiry
+
+    def _refresh_loop(self) -> None:
+        delay = self.seconds_until_refresh()
+        backoff = self.retry_interval
+        while not self._stop.wait(delay):
+            if self.refresh():
+                delay = self.seconds_until_refresh()
+                backoff = self.retry_interval
+            else:
+                delay = backoff
+                backoff = min(backoff * 2, self.max_retry_interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_credential_manager: LazySingleton[CredentialManager] = LazySingleton(CredentialManager)
+
+
+def get_credential_manager() -> CredentialManager:
+    return _credential_manager.get()
+
+
+def get_credentials() -> Credentials:
+    return _credential_manager.get().credentials
@@ -0,0 +1,124 @@
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.models.schemas import CalendarEvent
+
+
+class CalendarEventCache:
+    """Local copy of one calendar's events.
+
+    Tracks which time ranges have been fully listed so repeat queries over
+    those ranges are answered without an API call, and holds the
+    nextSyncToken used to pull incremental changes.
+    """
+
+    def __init__(self):
+        self.events: Dict[str, CalendarEvent] = {}
+        self.ranges: List[Tuple[datetime, datetime]] = []
+        self.sync_token: Optional[str] = None
+        self.last_sync: float = 0.0
+        # Guards the fields above; never held across an API call
+        self.lock = threading.RLock()
+        # Ranges being listed right now, so concurrent requests wait for
+        # them instead of listing the same window twice
+        self.in_flight: List[Tuple[datetime, datetime, threading.Event]] = []
+        self.syncing = False
+
+    def missing_ranges(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """Return the parts of [start, end) that have not been fetched yet"""
+        missing = []
+        cursor = start
+        for range_start, range_end in self.ranges:
+            if range_end <= cursor:
+                continue
+            if range_start >= end:
+                break
+            if range_start > cursor:
+                missing.append((cursor, range_start))
+            cursor = max(cursor, range_end)
+            if cursor >= end:
+                break
+        if cursor < end:
+            missing.append((cursor, end))
+        return missing
+
+    def claim_missing(
+        self, start: datetime, end: datetime
+    ) -> Tuple[List[Tuple[datetime, datetime, threading.Event]], List[threading.Event]]:
+        """Split the unfetched parts of [start, end) into ranges the caller
+        now owns and must fetch, and fetches in flight elsewhere to wait for.
+        Call with the lock held; pass each claim to release when done."""
+        claimed = []
+        waiting = []
+        for missing_start, missing_end in self.missing_ranges(start, end):
+            cursor = missing_start
+            for range_start, range_end, done in sorted(self.in_flight, key=lambda fetch: fetch[:2]):
+                if range_end <= cursor or range_start >= missing_end:
+                    continue
+                if range_start > cursor:
+                    claimed.append((cursor, range_start))
+                waiting.append(done)
+                cursor = max(cursor, range_end)
+                if cursor >= missing_end:
+                    break
+            if cursor < missing_end:
+                claimed.append((cursor, missing_end))
+        claims = [(range_start, range_end, threading.Event()) for range_start, range_end in claimed]
+        self.in_flight.extend(claims)
+        return claims, waiting
+
+    def release(self, claim: Tuple[datetime, datetime, threading.Event]) -> None:
+        """Drop a finished or failed fetch and wake its waiters. Call with
+        the lock held."""
+        self.in_flight.remove(claim)
+        claim[2].set()
+
+    def mark_covered(self, start: datetime, end: datetime) -> None:
+        merged = []
+        for range_start, range_end in sorted(self.ranges + [(start, end)]):
+            if merged and range_start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+            else:
+                merged.append((range_start, range_end))
+        self.ranges = merged
+
+    def upsert(self, event: CalendarEvent) -> None:
+        self.events[event.id] = event
+
+    def remove(self, event_id: str) -> None:
+        self.events.pop(event_id, None)
+
+    def events_between(self, start: datetime, end: datetime) -> List[CalendarEvent]:
+        """Events overlapping [start, end), ordered by start time"""
+        matching = [
+            event for event in self.events.values()
+            if event.start_time < end and event.end_time > start
+        ]
+        matching.sort(key=lambda event: event.start_time)
+        return matching
+
+    def clear(self) -> None:
+        self.events.clear()
+        self.ranges = []
+        self.sync_token = None
+        self.last_sync = 0.0
+
+
+class EventCache:
+    """Per-calendar event caches"""
+
+    def __init__(self):
+        self._calendars: Dict[str, CalendarEventCache] = {}
+        self._lock = threading.Lock()
+
+    def for_calendar(self, calendar_id: str) -> CalendarEventCache:
+        with self._lock:
+            cache = self._calendars.get(calendar_id)
+            if cache is None:
+                cache = self._calendars[calendar_id] = CalendarEventCache()
+            return cache
+
+    def clear(self) -> None:
+        with self._lock:
+            self._calendars.clear()
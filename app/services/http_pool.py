@@ -0,0 +1,36 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+
+class HttpPool:
+    """Bounded pool of HTTP clients for the Google API client library.
+
+    httplib2.Http is not thread-safe, so each API call borrows a client for
+    its duration instead of sharing one. Clients go back to the pool with
+    their keep-alive connections open, so later calls skip the TCP and TLS
+    handshake. At most `size` clients exist; further callers wait for one
+    to be returned.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = 8):
+        if size <= 0:
+            raise ValueError("size must be positive")
+        self.size = size
+        self._factory = factory
+        # LIFO so the most recently used, still-connected client is reused
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        with self._slots:
+            try:
+                http = self._idle.get_nowait()
+            except queue.Empty:
+                http = self._factory()
+            try:
+                yield http
+            finally:
+                self._idle.put(http)
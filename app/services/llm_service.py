@@ -1,10 +1,25 @@
 import os
+import re
+import json
+import hashlib
+import heapq
+import itertools
 import logging
+import threading
+import time
 import traceback
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
 
 from langchain_openai import ChatOpenAI
+from langchain.callbacks import get_openai_callback
 from langchain.schema import HumanMessage, SystemMessage
 from config.settings import settings
+from app.utils.cache import TTLCache
+from app.utils.lazy import LazySingleton
+from app.utils.metrics import (
+    LLM_QUEUE_DEPTH, LLM_QUEUE_SECONDS, LLM_REJECTED, record_cache_lookup, record_llm_call
+)
 
 # ✅ Correct OpenAI exception import for modern SDK (v1.x)
 from openai import OpenAIError, RateLimitError
@@ -13,6 +28,166 @@ from openai import OpenAIError, RateLimitError
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# ISO timestamps are reduced to their date so a "current time" line in a
+# system prompt does not make every request a cache miss
+TIMESTAMP_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2})[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Scheduler priorities; lower values are admitted first
+PRIORITY_BOOKING = 0
+PRIORITY_CHAT = 1
+
+
+class LLMOverloadedError(Exception):
+    """The scheduler could not admit an LLM request in time"""
+
+
+class TokenBucket:
+    """Allowance of per_minute units, refilled continuously. Not thread-safe;
+    LLMScheduler only touches it under its own lock."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken; requests larger than the
+        bucket wait for a full one"""
+        self._refill(now)
+        return max((min(amount, self.capacity) - self.level) / self.rate, 0.0)
+
+    def take(self, amount: float, now: float) -> None:
+        # The level may go negative; later requests then wait off the debt
+        self._refill(now)
+        self.level = min(self.capacity, self.level - amount)
+
+
+class LLMScheduler:
+    """Admission control shared by every LLM call in the process.
+
+    Requests queue by priority until a concurrency slot is free and the
+    requests- and tokens-per-minute buckets allow them. When the queue is
+    full, or the wait would exceed max_wait_seconds, they fail fast with
+    LLMOverloadedError instead of piling onto a rate-limited API. A rate
+    limit response pauses admission for everyone, rather than every request
+    retrying on its own.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        max_wait_seconds: Optional[float] = None
+    ):
+        def setting(value, name, default):
+            return value if value is not None else getattr(settings, name, default)
+
+        self.max_concurrency = setting(max_concurrency, "llm_max_concurrency", 8)
+        rpm = setting(requests_per_minute, "llm_requests_per_minute", 500)
+        tpm = setting(tokens_per_minute, "llm_tokens_per_minute", 200_000)
+        # A limit of 0 turns that bucket off
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+        self.max_queue = setting(max_queue, "llm_max_queue", 64)
+        self.max_wait = setting(max_wait_seconds, "llm_max_queue_wait_seconds", 10.0)
+
+        self._cond = threading.Condition()
+        self._waiting: List[Tuple[int, int]] = []  # heap of (priority, arrival)
+        self._arrivals = itertools.count()
+        self._active = 0
+        self._paused_until = 0.0
+
+    def _admission_delay(self, tokens: int, now: float) -> Optional[float]:
+        """Seconds until a request could start, or None while every slot is busy"""
+        if self._active >= self.max_concurrency:
+            return None
+        delay = max(self._paused_until - now, 0.0)
+        if self._requests:
+            delay = max(delay, self._requests.wait_time(1, now))
+        if self._tokens:
+            delay = max(delay, self._tokens.wait_time(tokens, now))
+        return delay
+
+    def _acquire(self, tokens: int, priority: int) -> None:
+        started = time.monotonic()
+        deadline = started + self.max_wait
+        with self._cond:
+            if len(self._waiting) >= self.max_queue:
+                LLM_REJECTED.inc(reason="queue_full")
+                raise LLMOverloadedError(f"{len(self._waiting)} LLM requests already queued")
+
+            entry = (priority, next(self._arrivals))
+            heapq.heappush(self._waiting, entry)
+            LLM_QUEUE_DEPTH.set(len(self._waiting))
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = self._admission_delay(tokens, now) if self._waiting[0] == entry else None
+                    if delay == 0:
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0 or (delay is not None and delay > remaining):
+                        LLM_REJECTED.inc(reason="timeout")
+                        raise LLMOverloadedError(f"No LLM capacity within {self.max_wait:g}s")
+                    self._cond.wait(remaining if delay is None else delay)
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                LLM_QUEUE_DEPTH.set(len(self._waiting))
+                # Whoever is at the head now gets to check the limits
+                self._cond.notify_all()
+
+            self._active += 1
+            if self._requests:
+                self._requests.take(1, now)
+            if self._tokens:
+                self._tokens.take(tokens, now)
+        LLM_QUEUE_SECONDS.observe(time.monotonic() - started)
+
+    @contextmanager
+    def slot(self, tokens: int, priority: int = PRIORITY_CHAT) -> Iterator[None]:
+        """Hold a concurrency slot for one LLM call of about `tokens` tokens"""
+        self._acquire(tokens, priority)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def settle(self, estimated_tokens: int, used_tokens: int) -> None:
+        """Charge the token bucket for the difference once usage is known"""
+        if self._tokens and used_tokens != estimated_tokens:
+            with self._cond:
+                self._tokens.take(used_tokens - estimated_tokens, time.monotonic())
+                self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all admissions, e.g. after a rate limit response"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning("⏸️ LLM requests paused for %.1fs after a rate limit", seconds)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"active": self._active, "queued": len(self._waiting)}
+
+
+def _retry_after(error: Exception) -> float:
+    """Seconds the API asked us to back off, from the retry-after header"""
+    try:
+        return float(error.response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return getattr(settings, "llm_rate_limit_pause_seconds", 5.0)
+
 
 class LLMService:
     def __init__(self):
@@ -28,14 +203,70 @@ class LLMService:
             logger.error("❌ Failed to initialize LLM: %s", str(e))
             raise
 
-    def generate_response(self, messages: list[dict]) -> str:
+        self.cache = TTLCache(
+            maxsize=getattr(settings, "llm_cache_size", 512),
+            ttl=getattr(settings, "llm_cache_ttl_seconds", 3600)
+        )
+
+    def _cache_key(self, messages: list[dict]) -> str:
+        """Hash of the normalized conversation plus the model parameters"""
+        normalized = [
+            {
+                "role": msg.get("role"),
+                "content": WHITESPACE_PATTERN.sub(
+                    " ", TIMESTAMP_PATTERN.sub(r"\1", msg.get("content", ""))
+                ).strip()
+            }
+            for msg in messages
+        ]
+        payload = json.dumps({
+            "model": self.llm.model_name,
+            "temperature": self.llm.temperature,
+            "messages": normalized
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
+
+    def _count_tokens(self, messages: list) -> int:
+        try:
+            return self.llm.get_num_tokens_from_messages(messages)
+        except Exception:
+            # Needs tiktoken; fall back to the usual four characters a token
+            return sum(len(message.content) for message in messages) // 4
+
+    def generate_response(
+        self,
+        messages: list[dict],
+        use_cache: bool = True,
+        on_token: Optional[Callable[[str], None]] = None,
+        priority: int = PRIORITY_CHAT
+    ) -> str:
         """
         Generate a response using the LLM. Expects messages as:
         [
             {"role": "system", "content": "You are a helpful assistant."},
             {"role": "user", "content": "Book a slot for tomorrow at 3 PM."}
         ]
+
+        Successful responses are cached; pass use_cache=False to always
+        query the model. When on_token is given the completion is streamed
+        and on_token is called with each chunk as it arrives.
+
+        Calls that miss the cache go through the shared LLMScheduler; a
+        lower priority value is served first when requests queue.
         """
+        cache_key = self._cache_key(messages) if use_cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            record_cache_lookup("llm", hit=cached is not None)
+            if cached is not None:
+                logger.debug("LLM cache hit")
+                if on_token:
+                    on_token(cached)
+                return cached
+
         try:
             formatted_messages = []
             for msg in messages:
@@ -49,11 +280,42 @@ class LLMService:
                 else:
                     logger.warning(f"⚠️ Unknown role: {role}")
 
-            response = self.llm.invoke(formatted_messages)
-            return response.content
+            scheduler = get_llm_scheduler()
+            estimated_prompt_tokens = self._count_tokens(formatted_messages)
+            estimated_tokens = estimated_prompt_tokens + getattr(settings, "llm_expected_completion_tokens", 256)
+            with scheduler.slot(estimated_tokens, priority):
+                started = time.perf_counter()
+                if on_token:
+                    chunks = []
+                    for chunk in self.llm.stream(formatted_messages):
+                        if chunk.content:
+                            chunks.append(chunk.content)
+                            on_token(chunk.content)
+                    content = "".join(chunks)
+                    # Streamed completions carry no usage block; OpenAI sends
+                    # about one token per chunk
+                    prompt_tokens = estimated_prompt_tokens
+                    completion_tokens = len(chunks)
+                else:
+                    with get_openai_callback() as usage:
+                        content = self.llm.invoke(formatted_messages).content
+                    prompt_tokens = usage.prompt_tokens
+                    completion_tokens = usage.completion_tokens
+                record_llm_call(time.perf_counter() - started, prompt_tokens, completion_tokens)
+            if prompt_tokens or completion_tokens:
+                scheduler.settle(estimated_tokens, prompt_tokens + completion_tokens)
+
+            if cache_key:
+                self.cache.set(cache_key, content)
+            return content
+
+        except LLMOverloadedError as oe:
+            logger.warning("⚠️ LLM scheduler turned a request away: %s", str(oe))
+            return "⚠️ I’m handling a lot of requests right now. Please try again in a moment."
 
         except RateLimitError as re:
             logger.error("❌ Rate limit exceeded: %s", str(re))
+            get_llm_scheduler().pause(_retry_after(re))
             return "⚠️ I’m currently unable to connect to the AI service due to usage limits. Please try again shortly."
 
         except OpenAIError as oe:
@@ -66,5 +328,26 @@ class LLMService:
             return "⚠️ I encountered an internal error while trying to respond. Please try again later."
 
 
-# ✅ Global instance
-llm_service = LLMService()
+_llm_scheduler: LazySingleton[LLMScheduler] = LazySingleton(LLMScheduler)
+
+def get_llm_scheduler() -> LLMScheduler:
+    return _llm_scheduler.get()
+
+def set_llm_scheduler(scheduler: LLMScheduler) -> None:
+    _llm_scheduler.set(scheduler)
+
+# ✅ Shared instance, built on first use so importing this module stays offline
+_llm_service: LazySingleton[LLMService] = LazySingleton(LLMService)
+
+def get_llm_service() -> LLMService:
+    return _llm_service.get()
+
+def set_llm_service(service: LLMService) -> None:
+    """Replace the shared instance, e.g. with an offline fake"""
+    _llm_service.set(service)
+
+def __getattr__(name: str):
+    # Keeps `from app.services.llm_service import llm_service` working
+    if name == "llm_service":
+        return get_llm_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
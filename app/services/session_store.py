@@ -0,0 +1,156 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+from app.utils.cache import TTLCache
+from app.utils.lazy import LazySingleton
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore(ABC):
+    """Storage backend for per-session conversation data"""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return session data, or None if missing or expired"""
+
+    @abstractmethod
+    def set(self, session_id: str, data: Dict[str, Any]) -> None:
+        """Create or replace session data and restart its TTL"""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Remove a session, returning whether it existed"""
+
+    @abstractmethod
+    def list_sessions(self) -> List[str]:
+        """Return the ids of all live sessions"""
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store with LRU eviction and TTL expiry"""
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: Optional[float] = 3600):
+        self._cache = TTLCache(maxsize=max_sessions, ttl=ttl_seconds)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(session_id)
+
+    def set(self, session_id: str, data: Dict[str, Any]) -> None:
+        self._cache.set(session_id, data)
+
+    def delete(self, session_id: str) -> bool:
+        return self._cache.delete(session_id)
+
+    def list_sessions(self) -> List[str]:
+        return self._cache.keys()
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite-backed store shared by every worker pointing at the same file"""
+
+    def __init__(self, db_path: str = "sessions.db", ttl_seconds: Optional[float] = 3600):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._init_db()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)")
+
+    def _purge_expired(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM sessions WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE session_id = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (session_id, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            logger.warning(f"Discarding corrupt session data for {session_id}")
+            self.delete(session_id)
+            return None
+
+    def set(self, session_id: str, data: Dict[str, Any]) -> None:
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds is not None else None
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, data, expires_at) VALUES (?, ?, ?)",
+            (session_id, json.dumps(data, default=str), expires_at)
+        )
+        self._purge_expired(conn, now)
+
+    def delete(self, session_id: str) -> bool:
+        cursor = self._connection().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    def list_sessions(self) -> List[str]:
+        rows = self._connection().execute(
+            "SELECT session_id FROM sessions WHERE expires_at IS NULL OR expires_at > ?",
+            (time.time(),)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+
+def create_session_store() -> SessionStore:
+    """Build the session store configured in settings"""
+    backend = getattr(settings, "session_backend", "memory")
+    ttl_seconds = getattr(settings, "session_ttl_seconds", 3600)
+
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            db_path=getattr(settings, "session_db_path", "sessions.db"),
+            ttl_seconds=ttl_seconds
+        )
+    if backend == "memory":
+        return InMemorySessionStore(
+            max_sessions=getattr(settings, "session_max_entries", 10000),
+            ttl_seconds=ttl_seconds
+        )
+    raise ValueError(f"Unknown session backend: {backend}")
+
+
+# Shared instance, built on first use
+_session_store: LazySingleton[SessionStore] = LazySingleton(create_session_store)
+
+def get_session_store() -> SessionStore:
+    return _session_store.get()
+
+def set_session_store(store: SessionStore) -> None:
+    _session_store.set(store)
+
+def __getattr__(name: str):
+    # Keeps `from app.services.session_store import session_store` working
+    if name == "session_store":
+        return get_session_store()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,177 +1,350 @@
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, date, time
-from typing import Dict, Optional, Any
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple
 from dateutil.parser import parse as dateutil_parse
 
+from app.utils.cache import TTLCache
+from app.utils.metrics import record_cache_lookup
+
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+RELATIVE_DAYS = {
+    'today': 0,
+    'tomorrow': 1,
+    'day after tomorrow': 2,
+}
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+VAGUE_TIMES = {
+    'morning': time(9, 0),
+    'afternoon': time(14, 0),
+    'evening': time(18, 0),
+    'noon': time(12, 0),
+    'midnight': time(0, 0)
+}
+
+VAGUE_DURATIONS = {
+    'quick': 30,
+    'brief': 30,
+    'long': 120,
+    'extended': 120,
+}
+
+DURATION_PHRASES = {
+    'half an hour': 30,
+    'an hour': 60,
+}
+
+MEETING_TITLES = {
+    'call': 'Phone Call',
+    'meeting': 'Meeting',
+    'interview': 'Interview',
+    'discussion': 'Discussion',
+    'review': 'Review Meeting',
+    'standup': 'Standup Meeting',
+    'sync': 'Sync Meeting',
+    'demo': 'Demo',
+    'presentation': 'Presentation',
+    'training': 'Training Session',
+    'workshop': 'Workshop',
+    'consultation': 'Consultation',
+}
+
+_MONTH_NAMES = (
+    r'jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+    r'|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?'
+)
+
+# Every token the parser understands, in one pattern so a message is
+# scanned once. Each alternative is wrapped in a named group that
+# match.lastgroup reports; where two could start at the same position the
+# earlier one wins (dates before durations before clock times). Tokens only
+# start at a word boundary with one of these characters, and checking that
+# first lets the engine skip most positions without trying every branch.
+TOKEN_PATTERN = re.compile(r'''
+    \b(?=[\dabdefhjlmnoqstw])
+  (?:
+    (?P<relative_day>\bday\ after\ tomorrow\b|\btoday\b|\btomorrow\b)
+  | (?P<weekday>\b(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b)
+  | (?P<week>\b(?:next|this)\s+week\b)
+  | (?P<iso_date>(?<!\d)(?P<iso_year>\d{4})-(?P<iso_month>\d{1,2})-(?P<iso_day>\d{1,2})(?!\d))
+  | (?P<numeric_date>(?<![\d/])(?P<numeric_a>\d{1,2})/(?P<numeric_b>\d{1,2})(?:/(?P<numeric_year>\d{4}|\d{2}))?(?![\d/]))
+  | (?P<month_date>\b(?P<month_first>%(months)s)\.?\s+(?P<month_first_day>\d{1,2})(?:st|nd|rd|th)?\b(?:,?\s+(?P<month_first_year>\d{4})\b)?)
+  | (?P<day_month_date>(?<!\d)(?P<day_first>\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<day_first_month>%(months)s)\b(?:,?\s+(?P<day_first_year>\d{4})\b)?)
+  | (?P<duration>(?<![\d.])(?P<duration_value>\d+(?:\.\d+)?)\s*-?\s*(?P<duration_unit>hours?|hrs?|h|minutes?|mins?|m)\b)
+  | (?P<duration_phrase>\b(?:half\ an\ hour|an\ hour)\b)
+  | (?P<clock>(?<!\d)(?P<clock_hour>\d{1,2})[:.](?P<clock_minute>\d{2})(?!\d)(?:\s*(?P<clock_meridiem>[ap])\.?m\b\.?)?)
+  | (?P<hour>(?<!\d)(?P<hour_value>\d{1,2})\s*(?P<hour_meridiem>[ap])\.?m\b\.?)
+  | (?P<vague_time>\b(?:morning|afternoon|evening|noon|midnight)\b)
+  | (?P<vague_duration>\b(?:quick|brief|long|extended)\b)
+  | (?P<month>\b(?:%(months)s)\b)
+  )
+''' % {'months': _MONTH_NAMES}, re.VERBOSE)
+
+# Digits shaped like part of a date ("15.12", "12-15-24", "the 15th"); a
+# bare number such as "2" or "#2" is not one
+DATE_LIKE_PATTERN = re.compile(r'\d{1,4}[./-]\d{1,2}|\d{1,2}(?:st|nd|rd|th)\b')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+QUOTED_TITLE_PATTERN = re.compile(r'["\']([^"\']+)["\']')
+FOR_TITLE_PATTERN = re.compile(r'for\s+(.+?)(?:\s+(?:on|at|tomorrow|today|next|this)|\s*$)')
+
+# Confidence per kind of date, time and duration (see parse_natural_language)
+DATE_CONFIDENCE = {
+    'relative_day': 1.0,
+    'weekday': 1.0,
+    'iso_date': 1.0,
+    'month_date': 0.9,
+    'day_month_date': 0.9,
+    'numeric_date': 0.7,
+    'week': 0.6,
+    'fuzzy': 0.5,
+}
+
+
+def _to_24_hour(hour: int, meridiem: Optional[str]) -> int:
+    if meridiem == 'p' and hour != 12:
+        return hour + 12
+    if meridiem == 'a' and hour == 12:
+        return 0
+    return hour
+
+
+def _month_number(name: str) -> int:
+    return MONTHS[name[:3]]
+
 
 class DateTimeParser:
-    def __init__(self):
-        self.time_patterns = {
-            'morning': time(9, 0),
-            'afternoon': time(14, 0),
-            'evening': time(18, 0),
-            'noon': time(12, 0),
-            'midnight': time(0, 0)
-        }
-
-    def _get_weekday_offset(self, target_weekday: int) -> int:
-        today = datetime.now().weekday()
-        days_ahead = target_weekday - today
-        if days_ahead <= 0:
-            days_ahead += 7
-        return days_ahead
-
-    def _get_day_patterns(self) -> Dict[str, int]:
-        return {
-            'today': 0,
-            'tomorrow': 1,
-            'day after tomorrow': 2,
-            'monday': self._get_weekday_offset(0),
-            'tuesday': self._get_weekday_offset(1),
-            'wednesday': self._get_weekday_offset(2),
-            'thursday': self._get_weekday_offset(3),
-            'friday': self._get_weekday_offset(4),
-            'saturday': self._get_weekday_offset(5),
-            'sunday': self._get_weekday_offset(6),
-        }
-
-    def parse_natural_language(self, text: str) -> Dict[str, Any]:
-        text = text.lower().strip()
+    def __init__(self, cache_size: int = 4096):
+        self.time_patterns = VAGUE_TIMES
+        # Only the reference day affects a result, so keying on it keeps
+        # "tomorrow" correct across midnight without any expiry
+        self.cache = TTLCache(maxsize=cache_size)
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
+
+    def parse_natural_language(
+        self,
+        text: str,
+        reference_time: Optional[datetime] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """Extract date, time, duration and title from free text.
+
+        Relative terms ("tomorrow", "friday") are resolved against
+        reference_time, which defaults to now. Results are memoized per
+        normalized text and reference day; callers get their own copy.
+
+        'confidence' is the lowest confidence (0-1) among the date, time
+        and duration that were found: explicit values ("tomorrow", "2 pm",
+        "45 minutes") score high, vague ones ("next week", "afternoon",
+        "quick") and fuzzy dateutil matches score lower.
+        """
+        text = WHITESPACE_PATTERN.sub(' ', text.lower()).strip()
+        reference = reference_time or datetime.now()
+
+        if not use_cache:
+            return self._parse(text, reference)
+
+        key = (text, reference.date())
+        result = self.cache.get(key)
+        record_cache_lookup('date_parser', hit=result is not None)
+        if result is None:
+            result = self._parse(text, reference)
+            self.cache.set(key, result)
+        return dict(result)
+
+    def _parse(self, text: str, reference: datetime) -> Dict[str, Any]:
         result = {}
+        confidences = []
+
+        tokens = self._scan(text)
 
-        parsed_date = self._parse_date(text)
+        parsed_date, date_confidence = self._resolve_date(text, tokens, reference)
         if parsed_date:
             result['date'] = parsed_date
+            confidences.append(date_confidence)
 
-        parsed_time = self._parse_time(text)
+        parsed_time, time_confidence = self._resolve_time(tokens)
         if parsed_time:
             result['time'] = parsed_time
+            confidences.append(time_confidence)
 
-        duration = self._parse_duration(text)
+        duration, duration_confidence = self._resolve_duration(tokens)
         if duration:
             result['duration'] = duration
+            confidences.append(duration_confidence)
 
         title = self._extract_meeting_title(text)
         if title:
             result['title'] = title
 
-        return result
+        if confidences:
+            result['confidence'] = min(confidences)
 
-    def _parse_date(self, text: str) -> Optional[date]:
-        today = datetime.now().date()
-        day_patterns = self._get_day_patterns()
+        return result
 
-        for pattern, offset in day_patterns.items():
-            if pattern in text:
-                return today + timedelta(days=offset)
+    def _scan(self, text: str) -> Dict[str, List[re.Match]]:
+        """Group every token match by kind, in order of appearance"""
+        tokens: Dict[str, List[re.Match]] = {}
+        for match in TOKEN_PATTERN.finditer(text):
+            tokens.setdefault(match.lastgroup, []).append(match)
+        return tokens
+
+    def _resolve_date(
+        self,
+        text: str,
+        tokens: Dict[str, List[re.Match]],
+        reference: datetime
+    ) -> Tuple[Optional[date], float]:
+        today = reference.date()
+
+        # Named days beat explicit dates, which beat "next week"; within a
+        # rank the first mention wins
+        named = tokens.get('relative_day', []) + tokens.get('weekday', [])
+        if named:
+            match = min(named, key=lambda m: m.start())
+            word = match.group()
+            if match.lastgroup == 'relative_day':
+                return today + timedelta(days=RELATIVE_DAYS[word]), DATE_CONFIDENCE['relative_day']
+            days_ahead = (WEEKDAYS.index(word) - today.weekday()) % 7 or 7
+            return today + timedelta(days=days_ahead), DATE_CONFIDENCE['weekday']
+
+        explicit = [
+            match
+            for kind in ('iso_date', 'month_date', 'day_month_date', 'numeric_date')
+            for match in tokens.get(kind, [])
+        ]
+        for match in sorted(explicit, key=lambda m: m.start()):
+            parsed = self._explicit_date(match, today)
+            if parsed:
+                return parsed, DATE_CONFIDENCE[match.lastgroup]
 
-        if 'next week' in text:
-            return today + timedelta(days=7)
+        if 'week' in tokens:
+            if tokens['week'][0].group().startswith('next'):
+                return today + timedelta(days=7), DATE_CONFIDENCE['week']
+            return today + timedelta(days=1), DATE_CONFIDENCE['week']
 
-        if 'this week' in text:
-            return today + timedelta(days=1)
+        return self._fuzzy_date(text, tokens, reference)
 
-        # Try standard date formats
+    def _explicit_date(self, match: re.Match, today: date) -> Optional[date]:
+        kind = match.lastgroup
+        year = None
         try:
-            parsed = dateutil_parse(text, fuzzy=True, default=datetime.now())
-            return parsed.date()
-        except Exception:
+            if kind == 'iso_date':
+                return date(int(match['iso_year']), int(match['iso_month']), int(match['iso_day']))
+            if kind == 'month_date':
+                month, day = _month_number(match['month_first']), int(match['month_first_day'])
+                year = match['month_first_year']
+            elif kind == 'day_month_date':
+                month, day = _month_number(match['day_first_month']), int(match['day_first'])
+                year = match['day_first_year']
+            else:
+                # Month first like dateutil, unless that cannot be a month
+                month, day = int(match['numeric_a']), int(match['numeric_b'])
+                if month > 12:
+                    month, day = day, month
+                year = match['numeric_year']
+                if year and len(year) == 2:
+                    year = '20' + year
+
+            if year:
+                return date(int(year), month, day)
+            # Without a year, a date that has passed means next year's
+            parsed = date(today.year, month, day)
+            if parsed < today:
+                parsed = date(today.year + 1, month, day)
+            return parsed
+        except ValueError:
             return None
 
-    def _parse_time(self, text: str) -> Optional[time]:
-        for pattern, t in self.time_patterns.items():
-            if pattern in text:
-                return t
-
-        time_patterns = [
-            r'(\d{1,2}):(\d{2})\s*(am|pm)?',
-            r'(\d{1,2})\s*(am|pm)',
-            r'(\d{1,2})[:.](\d{2})'
-        ]
-
-        for pattern in time_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    groups = match.groups()
-                    if len(groups) == 3:
-                        hour, minute, ampm = int(groups[0]), int(groups[1]), groups[2]
-                        if ampm and ampm.lower() == 'pm' and hour != 12:
-                            hour += 12
-                        elif ampm and ampm.lower() == 'am' and hour == 12:
-                            hour = 0
-                        return time(hour, minute)
-                    elif len(groups) == 2:
-                        hour = int(groups[0])
-                        if groups[1] in ['am', 'pm']:
-                            ampm = groups[1].lower()
-                            if ampm == 'pm' and hour != 12:
-                                hour += 12
-                            elif ampm == 'am' and hour == 12:
-                                hour = 0
-                            return time(hour, 0)
-                        else:
-                            minute = int(groups[1])
-                            return time(hour, minute)
-                except Exception:
-                    continue
+    def _fuzzy_date(
+        self,
+        text: str,
+        tokens: Dict[str, List[re.Match]],
+        reference: datetime
+    ) -> Tuple[Optional[date], float]:
+        """Last resort for formats the scanner does not know.
+
+        dateutil is slow and, being fuzzy, answers "today" for nearly any
+        input and reads any bare number as a day of this month, so it only
+        runs when a month name or date-shaped digits are left once durations
+        and clock times are blanked out. A date that has already passed is
+        rejected rather than guessed forward.
+        """
+        remaining = text
+        for kind in ('duration', 'clock', 'hour'):
+            for match in tokens.get(kind, []):
+                start, end = match.span()
+                remaining = remaining[:start] + ' ' * (end - start) + remaining[end:]
+
+        if 'month' not in tokens and not DATE_LIKE_PATTERN.search(remaining):
+            return None, 0.0
 
-        return None
-
-    def _parse_duration(self, text: str) -> Optional[int]:
-        duration_patterns = [
-            r'(\d+)\s*hours?',
-            r'(\d+)\s*hrs?',
-            r'(\d+)\s*minutes?',
-            r'(\d+)\s*mins?',
-            r'(\d+)\s*h',
-            r'(\d+)\s*m',
-        ]
-
-        total_minutes = 0
-        for pattern in duration_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
-                value = int(match)
-                if 'hour' in pattern or 'hr' in pattern or pattern.endswith('h'):
-                    total_minutes += value * 60
-                else:
-                    total_minutes += value
-
-        if 'quick' in text or 'brief' in text:
-            return 30
-        elif 'long' in text or 'extended' in text:
-            return 120
-        elif total_minutes > 0:
-            return total_minutes
-
-        return None
+        try:
+            parsed = dateutil_parse(remaining, fuzzy=True, default=reference).date()
+        except (ValueError, OverflowError):
+            return None, 0.0
+        if parsed < reference.date():
+            return None, 0.0
+        return parsed, DATE_CONFIDENCE['fuzzy']
+
+    def _resolve_time(self, tokens: Dict[str, List[re.Match]]) -> Tuple[Optional[time], float]:
+        # An explicit clock time beats a vague "morning" anywhere in the text
+        explicit = tokens.get('clock', []) + tokens.get('hour', [])
+        for match in sorted(explicit, key=lambda m: m.start()):
+            if match.lastgroup == 'clock':
+                hour, minute, meridiem = int(match['clock_hour']), int(match['clock_minute']), match['clock_meridiem']
+            else:
+                hour, minute, meridiem = int(match['hour_value']), 0, match['hour_meridiem']
+
+            if meridiem and not 1 <= hour <= 12:
+                continue
+            try:
+                return time(_to_24_hour(hour, meridiem), minute), 1.0 if meridiem else 0.8
+            except ValueError:
+                continue
+
+        if 'vague_time' in tokens:
+            return VAGUE_TIMES[tokens['vague_time'][0].group()], 0.6
+
+        return None, 0.0
+
+    def _resolve_duration(self, tokens: Dict[str, List[re.Match]]) -> Tuple[Optional[int], float]:
+        # "1 hour 30 minutes" adds up; explicit amounts beat "quick"/"long"
+        total_minutes = 0.0
+        for match in tokens.get('duration', []):
+            value = float(match['duration_value'])
+            total_minutes += value * 60 if match['duration_unit'].startswith('h') else value
+        for match in tokens.get('duration_phrase', []):
+            total_minutes += DURATION_PHRASES[match.group()]
+
+        if total_minutes > 0:
+            return int(round(total_minutes)), 1.0
+
+        if 'vague_duration' in tokens:
+            return VAGUE_DURATIONS[tokens['vague_duration'][0].group()], 0.6
+
+        return None, 0.0
 
     def _extract_meeting_title(self, text: str) -> Optional[str]:
-        meeting_keywords = {
-            'call': 'Phone Call',
-            'meeting': 'Meeting',
-            'interview': 'Interview',
-            'discussion': 'Discussion',
-            'review': 'Review Meeting',
-            'standup': 'Standup Meeting',
-            'sync': 'Sync Meeting',
-            'demo': 'Demo',
-            'presentation': 'Presentation',
-            'training': 'Training Session',
-            'workshop': 'Workshop',
-            'consultation': 'Consultation',
-        }
-
-        for keyword, title in meeting_keywords.items():
+        for keyword, title in MEETING_TITLES.items():
             if keyword in text:
                 return title
 
-        quoted_match = re.search(r'["\']([^"\']+)["\']', text)
+        quoted_match = QUOTED_TITLE_PATTERN.search(text)
         if quoted_match:
             return quoted_match.group(1)
 
-        for_match = re.search(r'for\s+(.+?)(?:\s+(?:on|at|tomorrow|today|next|this)|\s*$)', text)
+        for_match = FOR_TITLE_PATTERN.search(text)
         if for_match:
             return for_match.group(1).strip()
 
@@ -182,8 +355,50 @@ class DateTimeParser:
 date_parser = DateTimeParser()
 
 # Public utility function
-def parse_natural_date_time(text: str) -> Dict[str, Any]:
-    return date_parser.parse_natural_language(text)
+def parse_natural_date_time(text: str, reference_time: Optional[datetime] = None) -> Dict[str, Any]:
+    return date_parser.parse_natural_language(text, reference_time)
+
+
+def _parse_chunk(texts: List[str], reference_time: datetime) -> List[Dict[str, Any]]:
+    return [date_parser.parse_natural_language(text, reference_time) for text in texts]
+
+
+def parse_many(
+    texts: Iterable[str],
+    reference_time: Optional[datetime] = None,
+    processes: Optional[int] = None,
+    chunksize: int = 500
+) -> Iterator[Dict[str, Any]]:
+    """Parse texts lazily, yielding one parse_natural_language result per
+    text in input order.
+
+    Every text is resolved against the same reference_time (default: now
+    at the first call), so a batch replayed across midnight stays
+    consistent. With processes > 1, chunks of chunksize texts are parsed
+    in a process pool; at most two chunks per process are in flight, so
+    memory stays bounded however long the input is. Results are pickled
+    back from the workers, so the pool only helps for large batches on a
+    machine with spare cores.
+    """
+    reference = reference_time or datetime.now()
+
+    if not processes or processes <= 1:
+        for text in texts:
+            yield date_parser.parse_natural_language(text, reference)
+        return
+
+    iterator = iter(texts)
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        pending = deque()
+        while True:
+            while len(pending) < processes * 2:
+                chunk = list(islice(iterator, chunksize))
+                if not chunk:
+                    break
+                pending.append(pool.submit(_parse_chunk, chunk, reference))
+            if not pending:
+                return
+            yield from pending.popleft().result()
 
 
 # Optional test
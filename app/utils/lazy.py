@@ -0,0 +1,39 @@
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LazySingleton(Generic[T]):
+    """Builds a shared instance on first use instead of at import time.
+
+    Construction happens at most once per process even when several
+    threads ask at the same moment. set() swaps in another instance, e.g.
+    an offline fake for tests or load runs.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
+
+    def set(self, instance: T) -> None:
+        with self._lock:
+            self._instance = instance
+
+    def reset(self) -> None:
+        with self._lock:
+            self._instance = None
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
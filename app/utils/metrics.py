@@ -0,0 +1,249 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Gauge:
+    """Value that goes up and down, e.g. a queue depth"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: per-bucket counts (the last slot is +Inf), sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {total[0]:g}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        metric = Gauge(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+REQUEST_SECONDS = metrics.histogram(
+    "booking_agent_request_duration_seconds", "Time to process one chat turn"
+)
+NODE_SECONDS = metrics.histogram(
+    "booking_agent_node_duration_seconds", "Time spent in each agent graph node", ["node"]
+)
+LLM_SECONDS = metrics.histogram(
+    "llm_request_duration_seconds", "Latency of LLM completions that reached the API"
+)
+LLM_TOKENS = metrics.counter(
+    "llm_tokens_total", "LLM tokens used, by prompt or completion", ["kind"]
+)
+LLM_QUEUE_DEPTH = metrics.gauge(
+    "llm_queue_depth", "LLM requests waiting for a scheduler slot"
+)
+LLM_QUEUE_SECONDS = metrics.histogram(
+    "llm_queue_wait_seconds", "Time LLM requests waited for a scheduler slot"
+)
+LLM_REJECTED = metrics.counter(
+    "llm_rejected_total", "LLM requests the scheduler turned away, by reason", ["reason"]
+)
+CALENDAR_SECONDS = metrics.histogram(
+    "calendar_api_duration_seconds", "Latency of Google Calendar API calls", ["method"]
+)
+CACHE_LOOKUPS = metrics.counter(
+    "cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"]
+)
+
+
+class RequestTrace:
+    """What one chat turn spent its time on, returned as the debug field"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total_seconds: Optional[float] = None
+        self.nodes: List[Dict[str, Any]] = []
+        self.llm_calls = 0
+        self.llm_prompt_tokens = 0
+        self.llm_completion_tokens = 0
+        self.calendar_api_calls = 0
+        self.cache: Dict[str, Dict[str, int]] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_ms": round((self.total_seconds or 0.0) * 1000, 2),
+            "nodes": [dict(node) for node in self.nodes],
+            "llm_calls": self.llm_calls,
+            "llm_prompt_tokens": self.llm_prompt_tokens,
+            "llm_completion_tokens": self.llm_completion_tokens,
+            "calendar_api_calls": self.calendar_api_calls,
+            "cache": {name: dict(counts) for name, counts in self.cache.items()}
+        }
+
+
+# The trace of the turn running in this context. Graph nodes run in
+# context-copying executors and mutate the same RequestTrace object.
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_request() -> Iterator[RequestTrace]:
+    trace = RequestTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.total_seconds = time.perf_counter() - trace.started
+        REQUEST_SECONDS.observe(trace.total_seconds)
+
+
+def record_node(node: str, seconds: float) -> None:
+    NODE_SECONDS.observe(seconds, node=node)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.nodes.append({"node": node, "ms": round(seconds * 1000, 2)})
+
+
+def record_llm_call(seconds: float, prompt_tokens: int, completion_tokens: int) -> None:
+    LLM_SECONDS.observe(seconds)
+    LLM_TOKENS.inc(prompt_tokens, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, kind="completion")
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.llm_calls += 1
+        trace.llm_prompt_tokens += prompt_tokens
+        trace.llm_completion_tokens += completion_tokens
+
+
+def record_calendar_call(method: str, seconds: float) -> None:
+    CALENDAR_SECONDS.observe(seconds, method=method)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.calendar_api_calls += 1
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    result = "hit" if hit else "miss"
+    CACHE_LOOKUPS.inc(cache=cache, result=result)
+    trace = _current_trace.get()
+    if trace is not None:
+        counts = trace.cache.setdefault(cache, {"hit": 0, "miss": 0})
+        counts[result] += 1
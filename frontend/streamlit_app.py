@@ -94,6 +94,45 @@ def send_message_to_agent(message: str, session_id: str) -> Dict[str, Any]:
         st.error(f"Failed to connect to agent: {str(e)}")
         return {"response": "I'm sorry, I'm having trouble connecting. Please try again.", "state": "error"}
 
+def stream_message_to_agent(message: str, session_id: str, placeholder) -> Dict[str, Any]:
+    """Send message to the streaming endpoint, rendering progress as it arrives"""
+    node_labels = {
+        "understand_intent": "Understanding your request...",
+        "check_availability": "Checking the calendar...",
+        "suggest_slots": "Preparing suggestions...",
+        "confirm_booking": "Preparing booking details...",
+        "complete_booking": "Booking the slot..."
+    }
+    partial_response = ""
+
+    try:
+        with requests.post(
+            f"{API_BASE_URL}/chat/stream",
+            json={"message": message, "session_id": session_id},
+            stream=True,
+            timeout=(5, 60)
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data: "):
+                    continue
+
+                event = json.loads(line[len("data: "):])
+                if event["type"] == "token":
+                    partial_response += event["content"]
+                    placeholder.markdown(partial_response + "▌")
+                elif event["type"] == "node" and not partial_response:
+                    placeholder.markdown(f"_{node_labels.get(event['node'], 'Working...')}_")
+                elif event["type"] == "done":
+                    return event
+                elif event["type"] == "error":
+                    return {"response": event["message"], "state": "error"}
+    except requests.exceptions.RequestException as e:
+        st.error(f"Failed to connect to agent: {str(e)}")
+        return {"response": "I'm sorry, I'm having trouble connecting. Please try again.", "state": "error"}
+
+    return {"response": partial_response or "I'm sorry, the response was interrupted. Please try again.", "state": "error"}
+
 def display_chat_message(message: str, is_user: bool = False):
     """Display a chat message with styling"""
     message_class = "user" if is_user else "assistant"
@@ -220,9 +259,9 @@ if submit_button and user_input:
     # Update status
     st.session_state.agent_status = "thinking"
     
-    # Send to agent and get response
-    with st.spinner("Agent is thinking..."):
-        agent_response = send_message_to_agent(user_input, st.session_state.session_id)
+    # Stream the agent response into a placeholder as it is generated
+    response_placeholder = st.empty()
+    agent_response = stream_message_to_agent(user_input, st.session_state.session_id, response_placeholder)
     
     # Add agent response to chat
     st.session_state.messages.append({"content": agent_response["response"], "is_user": False})
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Availability Benchmark
+Compares the sweep-line availability engine with the previous per-day
+rescan of find_available_slots on synthetic calendars of growing size.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.availability import merge_intervals, iter_free_slots, nearest_slots
+
+
+def legacy_find_available_slots(events, start_date, end_date, duration_minutes=60,
+                                working_hours_start=9, working_hours_end=17):
+    """The pre-engine algorithm: filter and sort the full event list per day"""
+    available_slots = []
+    current_date = start_date.date()
+
+    while current_date <= end_date.date():
+        if current_date.weekday() >= 5:
+            current_date += timedelta(days=1)
+            continue
+
+        day_start = datetime.combine(current_date, datetime.min.time().replace(hour=working_hours_start))
+        day_end = datetime.combine(current_date, datetime.min.time().replace(hour=working_hours_end))
+
+        day_events = [event for event in events if event[0].date() == current_date]
+        day_events.sort(key=lambda x: x[0])
+
+        current_time = day_start
+        for event_start, event_end in day_events:
+            if (event_start - current_time).total_seconds() >= duration_minutes * 60:
+                available_slots.append((current_time, event_start))
+            current_time = max(current_time, event_end)
+
+        if (day_end - current_time).total_seconds() >= duration_minutes * 60:
+            available_slots.append((current_time, day_end))
+
+        current_date += timedelta(days=1)
+
+    return available_slots
+
+
+def engine_find_available_slots(events, start_date, end_date, duration_minutes=60):
+    return list(iter_free_slots(merge_intervals(events), start_date, end_date, duration_minutes))
+
+
+def engine_first_k(busy, start_date, end_date, duration_minutes, k):
+    return list(islice(iter_free_slots(busy, start_date, end_date, duration_minutes), k))
+
+
+def engine_nearest_k(busy, start_date, end_date, duration_minutes, k, preferred):
+    return nearest_slots(iter_free_slots(busy, start_date, end_date, duration_minutes), preferred, duration_minutes, k)
+
+
+def generate_events(start_date, days, events_per_day, seed=42):
+    """Random meetings between 9:00 and 17:00 that never cross midnight"""
+    rng = random.Random(seed)
+    events = []
+    for day in range(days):
+        day_start = datetime.combine((start_date + timedelta(days=day)).date(), datetime.min.time())
+        for _ in range(events_per_day):
+            start = day_start + timedelta(hours=9, minutes=15 * rng.randrange(0, 30))
+            events.append((start, start + timedelta(minutes=15 * rng.randrange(1, 5))))
+    rng.shuffle(events)
+    return events
+
+
+def time_call(func, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 30, 90, 365])
+    parser.add_argument("--events-per-day", type=int, default=8)
+    parser.add_argument("--duration", type=int, default=30, help="Slot duration in minutes")
+    parser.add_argument("-k", type=int, default=3, help="Slots wanted in the top-k comparison")
+    args = parser.parse_args()
+
+    start_date = datetime(2024, 1, 1)
+
+    print("📊 Availability engine benchmark")
+    print("=" * 72)
+    print(f"{'days':>6} {'events':>8} {'legacy (ms)':>13} {'engine (ms)':>13} {'speedup':>9} {'match':>7}")
+
+    for days in args.days:
+        events = generate_events(start_date, days, args.events_per_day)
+        # End on the last day's evening so both versions cover the same days
+        end_date = start_date + timedelta(days=days - 1, hours=23, minutes=59)
+
+        legacy_time, legacy_slots = time_call(
+            legacy_find_available_slots, events, start_date, end_date, args.duration
+        )
+        engine_time, engine_slots = time_call(
+            engine_find_available_slots, events, start_date, end_date, args.duration
+        )
+
+        print(
+            f"{days:>6} {len(events):>8} {legacy_time * 1000:>13.2f} {engine_time * 1000:>13.2f} "
+            f"{legacy_time / engine_time:>8.1f}x {str(legacy_slots == engine_slots):>7}"
+        )
+
+    # Slot search alone, on pre-merged busy time: every gap versus stopping
+    # after k, chronologically or ranked around 3pm on the second day
+    print()
+    print(f"Top-{args.k} slot search")
+    print(f"{'days':>6} {'all (ms)':>10} {'first k (ms)':>13} {'nearest k (ms)':>15}")
+    preferred = start_date + timedelta(days=1, hours=15)
+    for days in args.days:
+        busy = merge_intervals(generate_events(start_date, days, args.events_per_day))
+        end_date = start_date + timedelta(days=days - 1, hours=23, minutes=59)
+        all_time, _ = time_call(
+            lambda: list(iter_free_slots(busy, start_date, end_date, args.duration))
+        )
+        first_time, _ = time_call(engine_first_k, busy, start_date, end_date, args.duration, args.k)
+        nearest_time, _ = time_call(
+            engine_nearest_k, busy, start_date, end_date, args.duration, args.k, preferred
+        )
+        print(f"{days:>6} {all_time * 1000:>10.3f} {first_time * 1000:>13.3f} {nearest_time * 1000:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Busy Bitmap Benchmark
+Compares the interval-merging availability engine with the NumPy busy
+bitmap engine when intersecting several attendees' calendars over windows
+of growing length. Meetings sit on a 15-minute grid, so both engines must
+return the same gaps. The grid column times the bitmap intersection and
+run search alone, on bitmaps built beforehand.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import chain
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.availability import merge_intervals, iter_free_slots
+from app.services.busy_bitmap import BusyBitmap, iter_free_slots_bitmap
+
+
+def interval_engine(calendars, start, end, duration_minutes):
+    return list(iter_free_slots(merge_intervals(chain.from_iterable(calendars)), start, end, duration_minutes))
+
+
+def bitmap_engine(calendars, start, end, duration_minutes, resolution_minutes):
+    return list(iter_free_slots_bitmap(
+        calendars, start, end, duration_minutes, resolution_minutes=resolution_minutes
+    ))
+
+
+def grid_only(bitmaps, start, end, duration_minutes):
+    combined = bitmaps[0]
+    for bitmap in bitmaps[1:]:
+        combined = combined | bitmap
+    return list(combined.free_slots(start, end, duration_minutes))
+
+
+def generate_calendar(start_date, days, events_per_day, rng):
+    """Random working-hours meetings on a 15-minute grid"""
+    events = []
+    for day in range(days):
+        day_start = start_date + timedelta(days=day)
+        for _ in range(events_per_day):
+            start = day_start + timedelta(hours=9, minutes=15 * rng.randrange(0, 30))
+            events.append((start, start + timedelta(minutes=15 * rng.randrange(1, 5))))
+    rng.shuffle(events)
+    return events
+
+
+def time_call(func, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attendees", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--days", type=int, nargs="+", default=[14, 60, 180])
+    parser.add_argument("--events-per-day", type=int, default=4, help="Meetings per attendee per day")
+    parser.add_argument("--duration", type=int, default=30, help="Slot duration in minutes")
+    parser.add_argument("--resolution", type=int, default=5, help="Bitmap cell size in minutes")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start_date = datetime(2024, 1, 1)
+    rng = random.Random(args.seed)
+
+    print("📊 Busy bitmap benchmark")
+    print("=" * 88)
+    print(
+        f"{'attendees':>9} {'days':>6} {'events':>8} {'intervals (ms)':>15} "
+        f"{'bitmap (ms)':>12} {'grid (ms)':>10} {'speedup':>9} {'match':>7}"
+    )
+
+    for attendees in args.attendees:
+        for days in args.days:
+            calendars = [
+                generate_calendar(start_date, days, args.events_per_day, rng)
+                for _ in range(attendees)
+            ]
+            end_date = start_date + timedelta(days=days - 1, hours=23, minutes=59)
+
+            interval_time, interval_slots = time_call(
+                interval_engine, calendars, start_date, end_date, args.duration
+            )
+            bitmap_time, bitmap_slots = time_call(
+                bitmap_engine, calendars, start_date, end_date, args.duration, args.resolution
+            )
+            bitmaps = [
+                BusyBitmap.from_intervals(calendar, start_date, days, args.resolution)
+                for calendar in calendars
+            ]
+            grid_time, _ = time_call(grid_only, bitmaps, start_date, end_date, args.duration)
+
+            print(
+                f"{attendees:>9} {days:>6} {sum(map(len, calendars)):>8} {interval_time * 1000:>15.2f} "
+                f"{bitmap_time * 1000:>12.2f} {grid_time * 1000:>10.2f} {interval_time / bitmap_time:>8.1f}x "
+                f"{str(interval_slots == bitmap_slots):>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
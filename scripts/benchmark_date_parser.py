@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Date Parser Benchmark
+Measures parses/sec of DateTimeParser on a generated corpus of booking
+phrasings, and its accuracy against the known answers next to the
+previous implementation.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time as timer
+from datetime import datetime, timedelta, date, time
+from typing import Dict, Optional, Any, Tuple
+
+from dateutil.parser import parse as dateutil_parse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.date_parser import DateTimeParser, parse_many
+
+
+class LegacyDateTimeParser:
+    """The parser as it was before the single-pass scanner, kept verbatim"""
+
+    def __init__(self):
+        self.time_patterns = {
+            'morning': time(9, 0),
+            'afternoon': time(14, 0),
+            'evening': time(18, 0),
+            'noon': time(12, 0),
+            'midnight': time(0, 0)
+        }
+
+    def _get_weekday_offset(self, target_weekday: int) -> int:
+        today = datetime.now().weekday()
+        days_ahead = target_weekday - today
+        if days_ahead <= 0:
+            days_ahead += 7
+        return days_ahead
+
+    def _get_day_patterns(self) -> Dict[str, int]:
+        return {
+            'today': 0,
+            'tomorrow': 1,
+            'day after tomorrow': 2,
+            'monday': self._get_weekday_offset(0),
+            'tuesday': self._get_weekday_offset(1),
+            'wednesday': self._get_weekday_offset(2),
+            'thursday': self._get_weekday_offset(3),
+            'friday': self._get_weekday_offset(4),
+            'saturday': self._get_weekday_offset(5),
+            'sunday': self._get_weekday_offset(6),
+        }
+
+    def parse_natural_language(self, text: str) -> Dict[str, Any]:
+        """Extract date, time, duration and title from free text.
+
+        'confidence' is the lowest confidence (0-1) among the date, time
+        and duration that were found: explicit values ("tomorrow", "2 pm",
+        "45 minutes") score high, vague ones ("next week", "afternoon",
+        "quick") and fuzzy dateutil matches score lower.
+        """
+        text = text.lower().strip()
+        result = {}
+        confidences = []
+
+        parsed_date, date_confidence = self._parse_date(text)
+        if parsed_date:
+            result['date'] = parsed_date
+            confidences.append(date_confidence)
+
+        parsed_time, time_confidence = self._parse_time(text)
+        if parsed_time:
+            result['time'] = parsed_time
+            confidences.append(time_confidence)
+
+        duration, duration_confidence = self._parse_duration(text)
+        if duration:
+            result['duration'] = duration
+            confidences.append(duration_confidence)
+
+        title = self._extract_meeting_title(text)
+        if title:
+            result['title'] = title
+
+        if confidences:
+            result['confidence'] = min(confidences)
+
+        return result
+
+    def _parse_date(self, text: str) -> Tuple[Optional[date], float]:
+        today = datetime.now().date()
+        day_patterns = self._get_day_patterns()
+
+        for pattern, offset in day_patterns.items():
+            if pattern in text:
+                return today + timedelta(days=offset), 1.0
+
+        if 'next week' in text:
+            return today + timedelta(days=7), 0.6
+
+        if 'this week' in text:
+            return today + timedelta(days=1), 0.6
+
+        # Try standard date formats
+        try:
+            parsed = dateutil_parse(text, fuzzy=True, default=datetime.now())
+            return parsed.date(), 0.5
+        except Exception:
+            return None, 0.0
+
+    def _parse_time(self, text: str) -> Tuple[Optional[time], float]:
+        for pattern, t in self.time_patterns.items():
+            if pattern in text:
+                return t, 0.6
+
+        time_patterns = [
+            r'(\d{1,2}):(\d{2})\s*(am|pm)?',
+            r'(\d{1,2})\s*(am|pm)',
+            r'(\d{1,2})[:.](\d{2})'
+        ]
+
+        for pattern in time_patterns:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                try:
+                    groups = match.groups()
+                    if len(groups) == 3:
+                        hour, minute, ampm = int(groups[0]), int(groups[1]), groups[2]
+                        if ampm and ampm.lower() == 'pm' and hour != 12:
+                            hour += 12
+                        elif ampm and ampm.lower() == 'am' and hour == 12:
+                            hour = 0
+                        return time(hour, minute), 1.0 if ampm else 0.8
+                    elif len(groups) == 2:
+                        hour = int(groups[0])
+                        if groups[1] in ['am', 'pm']:
+                            ampm = groups[1].lower()
+                            if ampm == 'pm' and hour != 12:
+                                hour += 12
+                            elif ampm == 'am' and hour == 12:
+                                hour = 0
+                            return time(hour, 0), 1.0
+                        else:
+                            minute = int(groups[1])
+                            return time(hour, minute), 0.8
+                except Exception:
+                    continue
+
+        return None, 0.0
+
+    def _parse_duration(self, text: str) -> Tuple[Optional[int], float]:
+        duration_patterns = [
+            r'(\d+)\s*hours?',
+            r'(\d+)\s*hrs?',
+            r'(\d+)\s*minutes?',
+            r'(\d+)\s*mins?',
+            r'(\d+)\s*h',
+            r'(\d+)\s*m',
+        ]
+
+        total_minutes = 0
+        for pattern in duration_patterns:
+            matches = re.findall(pattern, text, re.IGNORECASE)
+            for match in matches:
+                value = int(match)
+                if 'hour' in pattern or 'hr' in pattern or pattern.endswith('h'):
+                    total_minutes += value * 60
+                else:
+                    total_minutes += value
+
+        if 'quick' in text or 'brief' in text:
+            return 30, 0.6
+        elif 'long' in text or 'extended' in text:
+            return 120, 0.6
+        elif total_minutes > 0:
+            return total_minutes, 1.0
+
+        return None, 0.0
+
+    def _extract_meeting_title(self, text: str) -> Optional[str]:
+        meeting_keywords = {
+            'call': 'Phone Call',
+            'meeting': 'Meeting',
+            'interview': 'Interview',
+            'discussion': 'Discussion',
+            'review': 'Review Meeting',
+            'standup': 'Standup Meeting',
+            'sync': 'Sync Meeting',
+            'demo': 'Demo',
+            'presentation': 'Presentation',
+            'training': 'Training Session',
+            'workshop': 'Workshop',
+            'consultation': 'Consultation',
+        }
+
+        for keyword, title in meeting_keywords.items():
+            if keyword in text:
+                return title
+
+        quoted_match = re.search(r'["\']([^"\']+)["\']', text)
+        if quoted_match:
+            return quoted_match.group(1)
+
+        for_match = re.search(r'for\s+(.+?)(?:\s+(?:on|at|tomorrow|today|next|this)|\s*$)', text)
+        if for_match:
+            return for_match.group(1).strip()
+
+        return None
+
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+FIELDS = ("date", "time", "duration")
+
+VERBS = ["Schedule", "Book", "Can we set up", "I need", "Let's have", "Please arrange", "Put in"]
+SUBJECTS = ["a meeting", "a call", "an interview", "a sync", "a review", "a demo", "some time"]
+TIMES = [
+    ("at 2 pm", time(14, 0)),
+    ("at 2pm", time(14, 0)),
+    ("at 10:30 am", time(10, 30)),
+    ("at 9am", time(9, 0)),
+    ("at 14:30", time(14, 30)),
+    ("at 4:15 PM", time(16, 15)),
+    ("at 12 pm", time(12, 0)),
+    ("in the morning", time(9, 0)),
+    ("in the afternoon", time(14, 0)),
+    ("in the evening", time(18, 0)),
+    ("at noon", time(12, 0)),
+    (None, None),
+]
+DURATIONS = [
+    ("for 30 minutes", 30),
+    ("for 45 mins", 45),
+    ("for 1 hour", 60),
+    ("for 2 hours", 120),
+    ("for 90 min", 90),
+    ("for an hour", 60),
+    ("for half an hour", 30),
+    ("for 1 hour 30 minutes", 90),
+    (None, None),
+]
+
+
+def date_phrases(reference: datetime, rng: random.Random):
+    today = reference.date()
+    weekday = rng.choice(WEEKDAYS)
+    weekday_date = today + timedelta(days=(WEEKDAYS.index(weekday) - today.weekday()) % 7 or 7)
+    later = today + timedelta(days=rng.randrange(20, 200))
+    day = later.day
+    suffix = "th" if 10 <= day % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(day % 10, "th")
+    return [
+        ("today", today),
+        ("tomorrow", today + timedelta(days=1)),
+        ("the day after tomorrow", today + timedelta(days=2)),
+        (f"on {weekday.capitalize()}", weekday_date),
+        (f"next {weekday}", weekday_date),
+        (f"this {weekday}", weekday_date),
+        ("next week", today + timedelta(days=7)),
+        (f"on {later.isoformat()}", later),
+        (f"on {later.strftime('%B')} {day}", later),
+        (f"on {later.strftime('%b')} {day}{suffix}", later),
+        (f"on the {day}{suffix} of {later.strftime('%B')}", later),
+        (None, None),
+    ]
+
+
+def generate_corpus(size: int, reference: datetime, seed: int = 7):
+    """Phrasings with the date, time and duration they should parse to"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        date_text, expected_date = rng.choice(date_phrases(reference, rng))
+        time_text, expected_time = rng.choice(TIMES)
+        duration_text, expected_duration = rng.choice(DURATIONS)
+
+        parts = [part for part in (date_text, time_text, duration_text) if part]
+        rng.shuffle(parts)
+        text = " ".join([rng.choice(VERBS), rng.choice(SUBJECTS)] + parts)
+        if rng.random() < 0.3:
+            text += rng.choice(["?", ".", " please", " if that works"])
+        if rng.random() < 0.2:
+            text = text.lower()
+
+        corpus.append((text, {"date": expected_date, "time": expected_time, "duration": expected_duration}))
+    return corpus
+
+
+def run(parse, corpus, repeat):
+    """Best wall time over repeat passes, plus the results of the last pass"""
+    best = float("inf")
+    results = []
+    for _ in range(repeat):
+        started = timer.perf_counter()
+        results = [parse(text) for text, _ in corpus]
+        best = min(best, timer.perf_counter() - started)
+    return best, results
+
+
+def score(corpus, results):
+    correct = {field: 0 for field in FIELDS}
+    exact = 0
+    for (_, expected), result in zip(corpus, results):
+        matches = [result.get(field) == expected[field] for field in FIELDS]
+        for field, ok in zip(FIELDS, matches):
+            correct[field] += ok
+        exact += all(matches)
+    return correct, exact
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=3000, help="Number of generated phrasings")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--show-misses", type=int, default=0, help="Print this many phrasings the new parser gets wrong")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Worker processes for the parse_many run")
+    args = parser.parse_args()
+
+    # The legacy parser reads the clock itself, so both use the real "now"
+    reference = datetime.now()
+    corpus = generate_corpus(args.size, reference)
+
+    legacy = LegacyDateTimeParser()
+    current = DateTimeParser()
+
+    legacy_time, legacy_results = run(legacy.parse_natural_language, corpus, args.repeat)
+    # Memoization is measured separately below, so this compares the parsers
+    current_time, current_results = run(
+        lambda text: current.parse_natural_language(text, reference, use_cache=False), corpus, args.repeat
+    )
+    cached_time, _ = run(lambda text: current.parse_natural_language(text, reference), corpus, args.repeat)
+
+    total = len(corpus)
+    legacy_correct, legacy_exact = score(corpus, legacy_results)
+    current_correct, current_exact = score(corpus, current_results)
+    agreement = sum(
+        all(old.get(field) == new.get(field) for field in FIELDS)
+        for old, new in zip(legacy_results, current_results)
+    )
+
+    print("📊 Date parser benchmark")
+    print("=" * 60)
+    print(f"Corpus: {total} phrasings, reference {reference:%Y-%m-%d %H:%M}")
+    print(f"{'':>16} {'legacy':>12} {'current':>12}")
+    print(f"{'parses/sec':>16} {total / legacy_time:>12,.0f} {total / current_time:>12,.0f}")
+    for field in FIELDS:
+        print(
+            f"{field + ' accuracy':>16} {legacy_correct[field] / total:>12.1%} "
+            f"{current_correct[field] / total:>12.1%}"
+        )
+    print(f"{'all fields':>16} {legacy_exact / total:>12.1%} {current_exact / total:>12.1%}")
+    print(f"Speedup: {legacy_time / current_time:.1f}x, same answer as legacy for {agreement / total:.1%}")
+    print(f"Memoized: {total / cached_time:,.0f} parses/sec, hit rate {current.cache_stats()['hit_rate']:.1%}")
+
+    # Bulk path: the corpus replayed 20 times, serially and in a process pool
+    bulk = [text for text, _ in corpus] * 20
+    for processes in (None, args.processes):
+        started = timer.perf_counter()
+        parsed = sum(1 for _ in parse_many(bulk, reference, processes=processes))
+        elapsed = timer.perf_counter() - started
+        print(f"parse_many ({processes or 1} process{'es' if processes and processes > 1 else ''}): {parsed / elapsed:,.0f} parses/sec")
+
+    shown = 0
+    for (text, expected), result in zip(corpus, current_results):
+        if shown >= args.show_misses:
+            break
+        if any(result.get(field) != expected[field] for field in FIELDS):
+            print(f"\n{text}\n  expected {expected}\n  got      {dict((f, result.get(f)) for f in FIELDS)}")
+            shown += 1
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Offline Load Test
+Drives the FastAPI app in-process with simulated booking conversations.
+OpenAI and Google Calendar are replaced by deterministic local fakes with
+configurable latency, so runs need no network or credentials and can be
+compared between commits.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain.schema import AIMessage
+from app.main import app
+from app.services.calendar_service import CalendarService, set_calendar_service
+from app.services.http_pool import HttpPool
+from app.services.llm_service import LLMScheduler, LLMService, set_llm_scheduler, set_llm_service
+from app.utils.cache import TTLCache
+from config.settings import settings
+
+# One simulated user: a request the LLM answers, slot choice and
+# confirmation, then a fully specified request the parser handles alone.
+# Each user asks about a different day so bookings do not fill the
+# calendar for everyone else.
+CONVERSATION = [
+    ("/chat", "Can we meet on {day} at 2pm?"),
+    ("/chat", "1"),
+    ("/chat", "yes"),
+    ("/chat/stream", "Book 30 minutes on friday at 10am"),
+]
+
+
+class Latency:
+    """Sleeps for base_ms +/- jitter, drawn from a seeded generator"""
+
+    def __init__(self, base_ms: float, jitter: float, seed: int):
+        self.base_ms = base_ms
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            factor = 1 + self._rng.uniform(-self.jitter, self.jitter)
+        time.sleep(max(self.base_ms * factor, 0) / 1000)
+
+
+class FakeChatModel:
+    """Stands in for ChatOpenAI inside the real LLMService"""
+
+    model_name = "fake-chat"
+    temperature = 0.0
+    reply = "Happy to help! Could you confirm how long the meeting should be?"
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+
+    def invoke(self, messages):
+        self.latency.wait()
+        return AIMessage(content=self.reply)
+
+    def stream(self, messages):
+        self.latency.wait()
+        for word in self.reply.split(" "):
+            yield AIMessage(content=word + " ")
+
+    def get_num_tokens_from_messages(self, messages) -> int:
+        return sum(len(message.content.split()) for message in messages)
+
+
+class OfflineLLMService(LLMService):
+    def __init__(self, latency: Latency):
+        self.llm = FakeChatModel(latency)
+        self.cache = TTLCache(
+            maxsize=getattr(settings, "llm_cache_size", 512),
+            ttl=getattr(settings, "llm_cache_ttl_seconds", 3600)
+        )
+
+
+class _Request:
+    def __init__(self, latency: Latency, run):
+        self.latency = latency
+        self.run = run
+
+    def execute(self, http=None):
+        self.latency.wait()
+        return self.run()
+
+
+class FakeCalendarAPI:
+    """The subset of the Calendar v3 client CalendarService uses"""
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.events_by_id: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def events(self):
+        return self
+
+    def freebusy(self):
+        return self
+
+    def list(self, calendarId, syncToken=None, timeMin=None, timeMax=None, **kwargs):
+        def run():
+            with self._lock:
+                if syncToken is not None:
+                    items = []
+                else:
+                    items = [
+                        event for event in self.events_by_id.values()
+                        if event["start"]["dateTime"] < timeMax and event["end"]["dateTime"] > timeMin
+                    ]
+            return {"items": items, "nextSyncToken": uuid.uuid4().hex}
+        return _Request(self.latency, run)
+
+    def insert(self, calendarId, body):
+        def run():
+            event = dict(body, id=uuid.uuid4().hex, status="confirmed")
+            event["start"] = {"dateTime": body["start"]["dateTime"] + "Z"}
+            event["end"] = {"dateTime": body["end"]["dateTime"] + "Z"}
+            with self._lock:
+                self.events_by_id[event["id"]] = event
+            return event
+        return _Request(self.latency, run)
+
+    def query(self, body):
+        def run():
+            return {"calendars": {item["id"]: {"busy": []} for item in body["items"]}}
+        return _Request(self.latency, run)
+
+
+class OfflineCalendarService(CalendarService):
+    def __init__(self, latency: Latency):
+        self._latency = latency
+        super().__init__()
+
+    def authenticate(self):
+        self.service = FakeCalendarAPI(self._latency)
+        self._http_pool = HttpPool(object, size=self.pool_size)
+
+
+def _failed(state: Any) -> bool:
+    # "error" when the turn raised, "ERROR" when a booking failed
+    return str(state).lower() == "error"
+
+
+async def post_chat(client: httpx.AsyncClient, path: str, message: str, session_id: str) -> Dict[str, Any]:
+    payload = {"message": message, "session_id": session_id, "debug": True}
+    if path == "/chat":
+        response = await client.post(path, json=payload)
+        body = response.json()
+        return {"ok": response.status_code == 200 and not _failed(body.get("state")), "debug": body.get("debug")}
+
+    # Read the SSE stream to the end; the done event carries the trace
+    done = None
+    async with client.stream("POST", path, json=payload) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                event = json.loads(line[6:])
+                if event["type"] in ("done", "error"):
+                    done = event
+    ok = response.status_code == 200 and done is not None and done["type"] == "done" and not _failed(done.get("state"))
+    return {"ok": ok, "debug": (done or {}).get("trace")}
+
+
+async def run_conversation(client, semaphore, index, latencies, node_timings, errors):
+    session_id = f"load-{index}"
+    day = (date.today() + timedelta(days=1 + index)).isoformat()
+    async with semaphore:
+        for path, template in CONVERSATION:
+            message = template.format(day=day)
+            started = time.perf_counter()
+            try:
+                result = await post_chat(client, path, message, session_id)
+            except Exception as e:
+                result = {"ok": False, "debug": None}
+                errors[path].append(str(e))
+            latencies[path].append(time.perf_counter() - started)
+            if not result["ok"]:
+                errors[path].append(f"{session_id}: {message!r}")
+            for node in (result["debug"] or {}).get("nodes", []):
+                node_timings[node["node"]].append(node["ms"] / 1000)
+
+        started = time.perf_counter()
+        response = await client.get(f"/sessions/{session_id}")
+        latencies["/sessions/{id}"].append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors["/sessions/{id}"].append(session_id)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def print_table(title: str, samples: Dict[str, List[float]], elapsed: float, errors=None) -> None:
+    print(title)
+    print(f"{'':<22} {'count':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, values in samples.items():
+        print(
+            f"{name:<22} {len(values):>7} {len(values) / elapsed:>8.1f} "
+            f"{percentile(values, 50) * 1000:>9.1f} {percentile(values, 95) * 1000:>9.1f} "
+            f"{percentile(values, 99) * 1000:>9.1f} {len((errors or {}).get(name, [])):>7}"
+        )
+
+
+async def main_async(args) -> int:
+    # Per-turn INFO logs would dominate the run time
+    logging.disable(logging.INFO)
+    set_llm_service(OfflineLLMService(Latency(args.llm_latency_ms, args.jitter, args.seed)))
+    if args.llm_concurrency:
+        set_llm_scheduler(LLMScheduler(max_concurrency=args.llm_concurrency))
+    calendar = OfflineCalendarService(Latency(args.calendar_latency_ms, args.jitter, args.seed + 1))
+    set_calendar_service(calendar)
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    node_timings: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, List[str]] = defaultdict(list)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(app=app, base_url="http://loadtest", timeout=None) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            run_conversation(client, semaphore, index, latencies, node_timings, errors)
+            for index in range(args.conversations)
+        ))
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in latencies.values())
+    print("🔥 Offline load test")
+    print("=" * 78)
+    print(
+        f"{args.conversations} conversations, concurrency {args.concurrency}, "
+        f"LLM {args.llm_latency_ms:g} ms, calendar {args.calendar_latency_ms:g} ms (±{args.jitter:.0%})"
+    )
+    print(f"{total} requests in {elapsed:.2f}s ({total / elapsed:.1f} req/s)")
+    print(f"{len(calendar.service.events_by_id)} of {args.conversations} conversations ended in a booking\n")
+    print_table("Endpoints", latencies, elapsed, errors)
+    print()
+    print_table("Graph nodes", node_timings, elapsed)
+
+    failed = sum(len(values) for values in errors.values())
+    if failed:
+        print(f"\n❌ {failed} failed requests, e.g. {next(v for v in errors.values() if v)[0]}")
+
+    chat_p95_ms = percentile(latencies["/chat"], 95) * 1000
+    if args.max_p95_ms and chat_p95_ms > args.max_p95_ms:
+        print(f"\n❌ /chat p95 {chat_p95_ms:.1f} ms exceeds the {args.max_p95_ms:g} ms budget")
+        return 1
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=400)
+    parser.add_argument("--calendar-latency-ms", type=float, default=80)
+    parser.add_argument("--llm-concurrency", type=int, default=0, help="LLM scheduler slots (default: settings)")
+    parser.add_argument("--jitter", type=float, default=0.25, help="Relative latency jitter, e.g. 0.25 for ±25%%")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-p95-ms", type=float, default=0, help="Exit non-zero if /chat p95 exceeds this")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
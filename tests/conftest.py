@@ -0,0 +1,99 @@
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List
+
+import pytest
+
+from app.agents.booking_agent import BookingAgent
+from app.models.schemas import BookingRequest, CalendarEvent
+from app.services import calendar_service, checkpoints, llm_service, session_store
+from app.services.availability import Interval
+from app.services.calendar_service import CalendarService
+from app.services.checkpoints import SessionMemorySaver
+from app.services.session_store import InMemorySessionStore
+
+
+class FakeLLMService:
+    """Answers every prompt with the same reply and records the prompts"""
+
+    def __init__(self, reply: str = "Happy to help! Which day and time suit you?"):
+        self.reply = reply
+        self.calls: List[List[Dict[str, str]]] = []
+
+    def generate_response(self, messages, on_token=None, priority=llm_service.PRIORITY_CHAT) -> str:
+        self.calls.append(messages)
+        return self.reply
+
+
+class FakeCalendarService(CalendarService):
+    """The real availability logic over an in-memory calendar. delay adds
+    latency to every call so concurrent turns overlap."""
+
+    def authenticate(self):
+        self.events: List[CalendarEvent] = []
+        self.busy: Dict[str, List[Interval]] = {}
+        self.delay = 0.0
+
+    def get_events(self, start_date: datetime, end_date: datetime) -> List[CalendarEvent]:
+        time.sleep(self.delay)
+        return sorted(
+            (event for event in self.events if event.start_time < end_date and event.end_time > start_date),
+            key=lambda event: event.start_time
+        )
+
+    def get_busy_intervals(self, calendar_ids, start_date, end_date) -> Dict[str, List[Interval]]:
+        return {calendar_id: self.busy.get(calendar_id, []) for calendar_id in calendar_ids}
+
+    def create_event(self, booking: BookingRequest) -> str:
+        time.sleep(self.delay)
+        event = CalendarEvent(
+            id=uuid.uuid4().hex,
+            title=booking.title,
+            start_time=booking.start_time,
+            end_time=booking.end_time
+        )
+        self.events.append(event)
+        return event.id
+
+
+@pytest.fixture
+def fake_llm():
+    service = FakeLLMService()
+    llm_service.set_llm_service(service)
+    yield service
+    llm_service._llm_service.reset()
+
+
+@pytest.fixture
+def fake_calendar():
+    service = FakeCalendarService()
+    calendar_service.set_calendar_service(service)
+    yield service
+    calendar_service._calendar_service.reset()
+
+
+@pytest.fixture
+def sessions():
+    store = InMemorySessionStore()
+    session_store.set_session_store(store)
+    yield store
+    session_store._session_store.reset()
+
+
+@pytest.fixture
+def make_agent(fake_llm, fake_calendar, sessions):
+    """Build BookingAgents on the fakes; the graph is compiled against the
+    checkpointer given, an in-memory one by default"""
+    agents = []
+
+    def build(checkpointer=None) -> BookingAgent:
+        checkpoints.set_checkpointer(checkpointer or SessionMemorySaver())
+        agent = BookingAgent()
+        agents.append(agent)
+        return agent
+
+    yield build
+    for agent in agents:
+        agent.shutdown()
+    checkpoints._checkpointer.reset()
@@ -0,0 +1,258 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from app.agents import booking_agent
+from app.agents.booking_agent import confirmation_reply
+from app.models.schemas import ConversationContext
+from app.services import session_store
+from app.services.checkpoints import CheckpointSerializer, SessionMemorySaver, SessionSqliteSaver
+from app.services.session_store import SQLiteSessionStore
+
+BOOKING_CONVERSATION = ("monday at 10am for 30 minutes", "1", "yes")
+METADATA = {"source": "loop", "step": 1, "writes": None}
+
+
+def converse(agent, session_id, messages=BOOKING_CONVERSATION):
+    return [agent.process_message(message, session_id) for message in messages]
+
+
+def node_names(result):
+    return [node["node"] for node in result["trace"]["nodes"]]
+
+
+def thread_config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def put_checkpoints(saver, thread_id, count):
+    ids = []
+    for _ in range(count):
+        checkpoint = empty_checkpoint()
+        saver.put(thread_config(thread_id), checkpoint, METADATA)
+        ids.append(checkpoint["id"])
+    return ids
+
+
+def test_checkpoint_serializer_round_trips_context():
+    context = ConversationContext(session_id="s1")
+    context.preferred_date = date(2030, 1, 7)
+    context.preferred_time = time(15, 30)
+    context.attendees = ["ana@example.com"]
+
+    serde = CheckpointSerializer()
+    restored = serde.loads(serde.dumps({"context": context, "day": date(2030, 1, 8)}))
+
+    assert restored["context"].preferred_date == date(2030, 1, 7)
+    assert restored["context"].preferred_time == time(15, 30)
+    assert restored["context"].attendees == ["ana@example.com"]
+    assert restored["day"] == date(2030, 1, 8)
+
+
+def test_memory_saver_keeps_latest_checkpoint_of_recent_sessions():
+    saver = SessionMemorySaver(max_sessions=2)
+    latest = put_checkpoints(saver, "a", 3)[-1]
+    put_checkpoints(saver, "b", 1)
+
+    assert saver.get_tuple(thread_config("a")).checkpoint["id"] == latest
+    assert len(list(saver.list(thread_config("a")))) == 1
+
+    # "a" was read last but only writes count as activity; "b" is newer
+    put_checkpoints(saver, "c", 1)
+    assert saver.get_tuple(thread_config("a")) is None
+    assert saver.get_tuple(thread_config("b")) is not None
+
+
+def test_memory_saver_lookups_do_not_grow_storage():
+    saver = SessionMemorySaver()
+    assert saver.get_tuple(thread_config("unknown")) is None
+    assert list(saver.list(thread_config("unknown"))) == []
+    assert "unknown" not in saver.storage
+
+
+def test_memory_saver_delete_thread():
+    saver = SessionMemorySaver()
+    put_checkpoints(saver, "a", 1)
+    saver.delete_thread("a")
+    assert saver.get_tuple(thread_config("a")) is None
+
+
+def test_sqlite_saver_keeps_latest_checkpoint_across_restarts(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    latest = put_checkpoints(SessionSqliteSaver(path), "a", 3)[-1]
+
+    reopened = SessionSqliteSaver(path)
+    assert reopened.get_tuple(thread_config("a")).checkpoint["id"] == latest
+    assert len(list(reopened.list(thread_config("a")))) == 1
+
+    reopened.delete_thread("a")
+    assert reopened.get_tuple(thread_config("a")) is None
+
+
+def test_sqlite_saver_purges_expired_sessions(tmp_path):
+    saver = SessionSqliteSaver(str(tmp_path / "checkpoints.db"), ttl_seconds=60)
+    put_checkpoints(saver, "a", 1)
+    with saver.lock, saver.cursor() as cur:
+        cur.execute("UPDATE checkpoints SET expires_at = 0 WHERE thread_id = 'a'")
+
+    put_checkpoints(saver, "b", 1)
+    assert saver.get_tuple(thread_config("a")) is None
+    assert saver.get_tuple(thread_config("b")) is not None
+
+
+def test_sqlite_saver_opens_a_database_written_before_expiry(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    put_checkpoints(SqliteSaver(sqlite3.connect(path, check_same_thread=False)), "a", 1)
+
+    saver = SessionSqliteSaver(path)
+    assert saver.get_tuple(thread_config("a")) is not None
+    latest = put_checkpoints(saver, "a", 1)[-1]
+    assert saver.get_tuple(thread_config("a")).checkpoint["id"] == latest
+    assert len(list(saver.list(thread_config("a")))) == 1
+
+
+def test_sqlite_saver_concurrent_writers_never_lose_the_latest_checkpoint(tmp_path):
+    saver = SessionSqliteSaver(str(tmp_path / "checkpoints.db"))
+    missing = []
+    start = threading.Barrier(8)
+
+    def write(index):
+        thread_id = f"session-{index}"
+        start.wait()
+        for _ in range(25):
+            checkpoint = empty_checkpoint()
+            saver.put(thread_config(thread_id), checkpoint, METADATA)
+            saved = saver.get_tuple(thread_config(thread_id))
+            if saved is None or saved.checkpoint["id"] < checkpoint["id"]:
+                missing.append(thread_id)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(8)))
+
+    assert missing == []
+    with saver.lock, saver.cursor(transaction=False) as cur:
+        cur.execute("SELECT thread_id, COUNT(*) FROM checkpoints GROUP BY thread_id")
+        assert sorted(cur.fetchall()) == [(f"session-{index}", 1) for index in range(8)]
+
+
+def test_booking_turns_resume_at_the_waiting_node(make_agent, fake_calendar):
+    agent = make_agent()
+    results = converse(agent, "s1")
+
+    assert [result["state"] for result in results] == ["COLLECTING_INFO", "CONFIRMING_BOOKING", "COMPLETED"]
+    # The slot pick and the confirmation skip intent analysis entirely
+    assert [node_names(result) for result in results[1:]] == [
+        ["confirm_booking"], ["complete_booking"]
+    ]
+    assert len(fake_calendar.events) == 1
+
+
+def test_concurrent_turns_on_sqlite_checkpoints_all_book(tmp_path, make_agent, fake_calendar):
+    saver = SessionSqliteSaver(str(tmp_path / "checkpoints.db"))
+    agent = make_agent(saver)
+    fake_calendar.delay = 0.02
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        runs = list(pool.map(lambda index: converse(agent, f"session-{index}"), range(16)))
+
+    assert [run[-1]["state"] for run in runs] == ["COMPLETED"] * 16
+    assert len(fake_calendar.events) == 16
+
+
+def test_turns_resume_on_a_worker_without_the_sessions_checkpoint(tmp_path, make_agent, fake_calendar):
+    # Two workers share the session store but each keeps checkpoints in memory
+    session_store.set_session_store(SQLiteSessionStore(str(tmp_path / "sessions.db")))
+    worker_a = make_agent(SessionMemorySaver())
+    worker_b = make_agent(SessionMemorySaver())
+
+    offered = worker_a.process_message("monday at 10am for 30 minutes", "s1")
+    # B never saw the session; A's checkpoint still waits for a slot choice
+    picked = worker_b.process_message("1", "s1")
+    booked = worker_a.process_message("yes", "s1")
+
+    assert offered["state"] == "COLLECTING_INFO"
+    assert node_names(picked) == ["confirm_booking"]
+    assert node_names(booked) == ["complete_booking"]
+    assert booked["state"] == "COMPLETED"
+    assert len(fake_calendar.events) == 1
+
+
+@pytest.mark.parametrize("reply, expected", [
+    ("yes", True),
+    ("Sure, book it", True),
+    ("sounds good!", True),
+    ("no", False),
+    ("Cancel that", False),
+    ("never mind", False),
+    ("yes... actually no", None),
+    ("what about thursday?", None),
+])
+def test_confirmation_reply(reply, expected):
+    assert confirmation_reply(reply) is expected
+
+
+@pytest.mark.parametrize("reply, expected", [
+    ("2", "b"),
+    ("#3", "c"),
+    ("option 1.", "a"),
+    ("the second one", "b"),
+    ("3rd please", "c"),
+    ("4", None),
+    ("3pm on friday", None),
+    ("I have 2 things to discuss", None),
+])
+def test_select_slot_only_takes_bare_numbers_and_ordinals(make_agent, reply, expected):
+    slots = [{"start": name} for name in "abcd"]
+    agent = make_agent()
+    agent.max_suggestions = 3
+    selected = agent._select_slot(reply, slots)
+    assert (selected["start"] if selected else None) == expected
+
+
+def test_new_request_while_slots_are_offered_searches_again(make_agent, fake_calendar):
+    agent = make_agent()
+    results = converse(agent, "s1", ["monday at 10am for 30 minutes", "Actually, make it 3pm on friday instead", "#3", "sure"])
+
+    assert node_names(results[1]) == ["understand_intent", "check_availability", "suggest_slots"]
+    assert [node_names(result) for result in results[2:]] == [["confirm_booking"], ["complete_booking"]]
+    assert results[-1]["state"] == "COMPLETED"
+    assert fake_calendar.events[0].start_time.weekday() == 4
+
+
+def test_declined_booking_is_not_created(make_agent, fake_calendar):
+    agent = make_agent()
+    results = converse(agent, "s1", ["monday at 10am for 30 minutes", "2", "no thanks"])
+
+    assert node_names(results[-1]) == ["complete_booking"]
+    assert results[-1]["state"] == "INITIAL"
+    assert fake_calendar.events == []
+
+
+def test_unclear_reply_to_confirmation_is_not_taken_as_an_answer(make_agent, fake_calendar):
+    agent = make_agent()
+    results = converse(agent, "s1", ["monday at 10am for 30 minutes", "2", "hmm, who else is coming?"])
+
+    assert node_names(results[-1])[0] == "understand_intent"
+    assert fake_calendar.events == []
+
+
+def test_same_day_search_starts_at_the_next_step_in_utc(make_agent, monkeypatch):
+    monkeypatch.setattr(booking_agent, "_utc_now", lambda: datetime(2030, 1, 7, 11, 7, 23, 123456))
+    agent = make_agent()
+    context = ConversationContext(session_id="s1")
+    context.preferred_date = date(2030, 1, 1)
+    context.preferred_time = time(11, 0)
+    context.duration = 30
+
+    state = agent._check_availability({"context": context, "user_message": "11am"})
+
+    # A day that has passed is moved to today, and today starts at 11:15
+    assert context.preferred_date == date(2030, 1, 7)
+    assert [slot["start"] for slot in state["availability"]] == [
+        "2030-01-07T11:15:00", "2030-01-07T11:45:00", "2030-01-07T12:15:00"
+    ]
@@ -0,0 +1,319 @@
+import socket
+from datetime import datetime, timedelta
+from itertools import chain
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from langchain.tools.base import ToolException
+
+from app.agents.tools import BookingTools
+from app.models.schemas import BookingRequest
+from app.services.availability import iter_free_slots, merge_intervals, nearest_slots
+from app.services.busy_bitmap import iter_free_slots_bitmap
+from app.services.calendar_service import EVENTS_BATCH_MAX, CalendarService
+from app.services.http_pool import HttpPool
+
+# A Monday, so the first five days of the window are working days
+MONDAY = datetime(2030, 1, 7)
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime:
+    return MONDAY + timedelta(days=day, hours=hour, minutes=minute)
+
+
+def test_merge_intervals_sorts_and_coalesces_overlapping_and_touching():
+    busy = [(at(0, 13), at(0, 14)), (at(0, 9), at(0, 10)), (at(0, 9, 30), at(0, 11)), (at(0, 11), at(0, 12))]
+    assert merge_intervals(busy) == [(at(0, 9), at(0, 12)), (at(0, 13), at(0, 14))]
+
+
+def test_merge_intervals_drops_empty_and_contained_intervals():
+    busy = [(at(0, 9), at(0, 17)), (at(0, 10), at(0, 11)), (at(0, 12), at(0, 12))]
+    assert merge_intervals(busy) == [(at(0, 9), at(0, 17))]
+
+
+def test_free_slots_fill_the_gaps_between_busy_time():
+    busy = merge_intervals([(at(0, 10), at(0, 11)), (at(0, 13), at(0, 15, 30))])
+    free = list(iter_free_slots(busy, at(0, 0), at(0, 23)))
+    assert free == [(at(0, 9), at(0, 10)), (at(0, 11), at(0, 13)), (at(0, 15, 30), at(0, 17))]
+
+
+def test_free_slots_skip_gaps_shorter_than_the_meeting():
+    busy = [(at(0, 9, 30), at(0, 16, 30))]
+    assert list(iter_free_slots(busy, at(0, 0), at(0, 23), duration_minutes=45)) == []
+    assert list(iter_free_slots(busy, at(0, 0), at(0, 23), duration_minutes=30)) == [
+        (at(0, 9), at(0, 9, 30)), (at(0, 16, 30), at(0, 17))
+    ]
+
+
+def test_free_slots_are_clipped_to_the_window():
+    free = list(iter_free_slots([], at(0, 11), at(1, 12)))
+    assert free == [(at(0, 11), at(0, 17)), (at(1, 9), at(1, 12))]
+
+
+def test_free_slots_skip_weekends_unless_asked_not_to():
+    saturday, sunday = at(5, 0), at(6, 23)
+    assert list(iter_free_slots([], saturday, sunday)) == []
+    assert len(list(iter_free_slots([], saturday, sunday, skip_weekends=False))) == 2
+
+
+def test_busy_time_crossing_midnight_blocks_both_days():
+    # An overnight event from Monday 4pm to Tuesday 10am
+    busy = [(at(0, 16), at(1, 10))]
+    free = list(iter_free_slots(busy, at(0, 0), at(1, 23)))
+    assert free == [(at(0, 9), at(0, 16)), (at(1, 10), at(1, 17))]
+
+
+def test_busy_time_spanning_whole_days_leaves_them_empty():
+    busy = [(at(0, 12), at(2, 12))]
+    free = list(iter_free_slots(busy, at(0, 0), at(2, 23)))
+    assert free == [(at(0, 9), at(0, 12)), (at(2, 12), at(2, 17))]
+
+
+def test_nearest_slots_are_ordered_by_distance_from_the_preferred_time():
+    free = list(iter_free_slots([(at(0, 12), at(0, 14))], at(0, 0), at(0, 23)))
+    slots = nearest_slots(free, at(0, 13), k=4)
+    assert [start for start, _ in slots] == [at(0, 14), at(0, 11), at(0, 15), at(0, 10)]
+    assert all(end - start == timedelta(hours=1) for start, end in slots)
+
+
+def test_nearest_slots_prefer_the_earlier_slot_on_a_tie():
+    free = [(at(0, 9), at(0, 10)), (at(0, 12), at(0, 13))]
+    assert nearest_slots(free, at(0, 10, 30), k=1) == [(at(0, 9), at(0, 10))]
+
+
+def test_nearest_slots_fit_the_meeting_inside_the_gap():
+    free = [(at(0, 9), at(0, 10, 30))]
+    assert nearest_slots(free, at(0, 10), duration_minutes=60, k=1) == [(at(0, 9, 30), at(0, 10, 30))]
+
+
+def test_nearest_slots_reach_the_next_day_past_overnight_busy_time():
+    free = list(iter_free_slots([(at(0, 16), at(1, 10))], at(0, 15), at(1, 23)))
+    assert nearest_slots(free, at(0, 17), k=2) == [(at(0, 15), at(0, 16)), (at(1, 10), at(1, 11))]
+
+
+def test_nearest_slots_with_no_free_time_or_k_of_zero():
+    assert nearest_slots([], at(0, 10)) == []
+    assert nearest_slots([(at(0, 9), at(0, 17))], at(0, 10), k=0) == []
+
+
+def test_bitmap_engine_matches_the_interval_engine():
+    calendars = [
+        [(at(0, 10), at(0, 11)), (at(0, 16), at(1, 10))],
+        [(at(0, 10, 30), at(0, 12)), (at(2, 9), at(2, 17))],
+        [(at(3, 13, 15), at(3, 13, 45))],
+    ]
+    window = (at(0, 8), at(6, 23))
+    expected = list(iter_free_slots(merge_intervals(chain.from_iterable(calendars)), *window, 30))
+    assert list(iter_free_slots_bitmap(calendars, *window, 30)) == expected
+
+
+def test_bitmap_engine_rounds_busy_time_outwards_to_whole_cells():
+    free = iter_free_slots_bitmap([[(at(0, 10, 2), at(0, 10, 58))]], at(0, 0), at(0, 23), 30, resolution_minutes=15)
+    assert list(free) == [(at(0, 9), at(0, 10)), (at(0, 11), at(0, 17))]
+
+
+class FakeBatch:
+    """Answers every insert in the batch, or the first one and then fails
+    the round-trip the way a dropped connection does"""
+
+    def __init__(self, callback, fail: bool):
+        self.callback = callback
+        self.fail = fail
+        self.request_ids = []
+
+    def add(self, request, request_id):
+        self.request_ids.append(request_id)
+
+    def execute(self, http=None):
+        for position, request_id in enumerate(self.request_ids):
+            if self.fail and position == 1:
+                raise socket.timeout("timed out")
+            self.callback(request_id, {
+                "id": f"event-{request_id}",
+                "start": {"dateTime": "2030-01-07T10:00:00Z"},
+                "end": {"dateTime": "2030-01-07T11:00:00Z"}
+            }, None)
+
+
+class FakeCalendarAPI:
+    def __init__(self, failing_batches):
+        self.failing_batches = failing_batches
+        self.batches = 0
+
+    def new_batch_http_request(self, callback):
+        self.batches += 1
+        return FakeBatch(callback, self.batches in self.failing_batches)
+
+    def events(self):
+        return self
+
+    def insert(self, calendarId, body):
+        return body
+
+
+class BatchCalendarService(CalendarService):
+    def authenticate(self):
+        self.service = FakeCalendarAPI(failing_batches={2})
+        self._http_pool = HttpPool(object)
+
+
+def test_create_events_reports_items_of_a_failed_chunk_and_runs_the_rest():
+    service = BatchCalendarService()
+    booking = BookingRequest(title="Sync", start_time=at(0, 10), end_time=at(0, 11))
+    results = service.create_events([booking] * (EVENTS_BATCH_MAX * 2 + 1))
+
+    assert [result["index"] for result in results] == list(range(EVENTS_BATCH_MAX * 2 + 1))
+    failed = [result for result in results if not result["success"]]
+    # The failed chunk answered its first insert before the connection dropped
+    assert [result["index"] for result in failed] == list(range(EVENTS_BATCH_MAX + 1, EVENTS_BATCH_MAX * 2))
+    assert {result["error"] for result in failed} == {"timed out"}
+    assert results[-1] == {"index": EVENTS_BATCH_MAX * 2, "success": True,
+                           "event_id": f"event-{EVENTS_BATCH_MAX * 2}", "error": None}
+    assert service.service.batches == 3
+
+
+def http_error(status: int) -> HttpError:
+    return HttpError(httplib2.Response({"status": status}), b"{}")
+
+
+class FakeRequest:
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+
+    def execute(self, http=None):
+        if self.error:
+            raise self.error
+        return self.response
+
+
+class FakeEventsAPI:
+    """events.list for one event on Monday; errors maps "list" (a range
+    fetch) or "sync" (an incremental sync) to the error it raises"""
+
+    def __init__(self):
+        self.errors = {}
+        self.calls = []
+
+    def events(self):
+        return self
+
+    def list(self, **params):
+        kind = "sync" if "syncToken" in params else "list"
+        self.calls.append(kind)
+        if kind in self.errors:
+            return FakeRequest(error=self.errors[kind])
+        items = [] if kind == "sync" else [{
+            "id": "standup",
+            "summary": "Standup",
+            "start": {"dateTime": "2030-01-07T10:00:00Z"},
+            "end": {"dateTime": "2030-01-07T10:30:00Z"}
+        }]
+        return FakeRequest({"items": items, "nextSyncToken": "token"})
+
+
+class EventsCalendarService(CalendarService):
+    def authenticate(self):
+        self.service = FakeEventsAPI()
+        self._http_pool = HttpPool(object)
+        # Sync on every call after the first fetch
+        self.sync_interval = 0
+
+
+@pytest.mark.parametrize("status", [403, 500])
+def test_get_events_serves_the_cache_when_sync_fails(status):
+    service = EventsCalendarService()
+    assert [event.id for event in service.get_events(at(0, 0), at(1, 0))] == ["standup"]
+
+    service.service.errors["sync"] = http_error(status)
+    assert [event.id for event in service.get_events(at(0, 0), at(1, 0))] == ["standup"]
+    assert service.service.calls == ["list", "sync"]
+
+
+def test_get_events_refetches_after_the_sync_token_expires():
+    service = EventsCalendarService()
+    service.get_events(at(0, 0), at(1, 0))
+
+    service.service.errors["sync"] = http_error(410)
+    assert [event.id for event in service.get_events(at(0, 0), at(1, 0))] == ["standup"]
+    assert service.service.calls == ["list", "sync", "list"]
+
+
+def test_get_events_raises_when_an_unfetched_range_fails():
+    service = EventsCalendarService()
+    service.service.errors["list"] = http_error(500)
+
+    with pytest.raises(HttpError):
+        service.get_events(at(0, 0), at(1, 0))
+    del service.service.errors["list"]
+    assert [event.id for event in service.get_events(at(0, 0), at(1, 0))] == ["standup"]
+
+
+class FakeFreeBusyAPI:
+    """freebusy.query where ana is busy on Monday morning and the calendar
+    of anyone at private.example.com cannot be read"""
+
+    def __init__(self):
+        self.error = None
+
+    def freebusy(self):
+        return self
+
+    def query(self, body):
+        if self.error:
+            return FakeRequest(error=self.error)
+        calendars = {}
+        for item in body["items"]:
+            if item["id"].endswith("@private.example.com"):
+                calendars[item["id"]] = {"errors": [{"domain": "global", "reason": "notFound"}]}
+            elif item["id"] == "ana@example.com":
+                calendars[item["id"]] = {"busy": [{"start": "2030-01-07T09:00:00Z", "end": "2030-01-07T12:00:00Z"}]}
+            else:
+                calendars[item["id"]] = {"busy": []}
+        return FakeRequest({"calendars": calendars})
+
+
+class FreeBusyCalendarService(CalendarService):
+    def authenticate(self):
+        self.service = FakeFreeBusyAPI()
+        self._http_pool = HttpPool(object)
+        self.created = []
+
+    def create_event(self, booking):
+        self.created.append(booking)
+        return "event-1"
+
+
+def test_busy_intervals_skip_calendars_the_api_reports_errors_for():
+    service = FreeBusyCalendarService()
+    busy = service.get_busy_intervals(
+        ["ana@example.com", "ben@example.com", "cy@private.example.com"], at(0, 0), at(1, 0)
+    )
+    assert busy == {"ana@example.com": [(at(0, 9), at(0, 12))], "ben@example.com": []}
+
+
+def test_busy_intervals_raise_when_the_query_fails():
+    service = FreeBusyCalendarService()
+    service.service.error = http_error(503)
+
+    with pytest.raises(HttpError):
+        service.get_busy_intervals(["ana@example.com"], at(0, 0), at(1, 0))
+
+
+@pytest.mark.parametrize("error, attendee", [(None, "ana@example.com"), (http_error(503), "ben@example.com")])
+def test_book_slot_refuses_when_attendees_are_busy_or_unknown(error, attendee):
+    service = FreeBusyCalendarService()
+    service.service.error = error
+
+    with pytest.raises(ToolException):
+        BookingTools(service).book_slot("Sync", at(0, 10).isoformat(), at(0, 11).isoformat(), [attendee])
+    assert service.created == []
+
+
+def test_book_slot_books_when_attendees_are_free():
+    service = FreeBusyCalendarService()
+    result = BookingTools(service).book_slot("Sync", at(0, 14).isoformat(), at(0, 15).isoformat(), ["ana@example.com"])
+
+    assert result["status"] == "success"
+    assert len(service.created) == 1
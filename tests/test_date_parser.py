@@ -0,0 +1,58 @@
+from datetime import date, datetime, time
+
+import pytest
+
+from app.utils.date_parser import DateTimeParser
+
+# A Wednesday
+REFERENCE = datetime(2030, 1, 9, 12, 0)
+
+
+@pytest.fixture
+def parser():
+    return DateTimeParser()
+
+
+def parse(parser, text):
+    return parser.parse_natural_language(text, REFERENCE, use_cache=False)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("tomorrow at 10am", {"date": date(2030, 1, 10), "time": time(10, 0)}),
+    ("friday at 3pm", {"date": date(2030, 1, 11), "time": time(15, 0)}),
+    ("next tuesday", {"date": date(2030, 1, 15)}),
+    ("2 hours on friday", {"date": date(2030, 1, 11), "duration": 120}),
+    ("half an hour", {"duration": 30}),
+    ("at 2pm", {"time": time(14, 0)}),
+    ("meeting on 2030-01-20 at 9:30", {"date": date(2030, 1, 20), "time": time(9, 30)}),
+])
+def test_parses_dates_times_and_durations(parser, text, expected):
+    result = parse(parser, text)
+    assert {key: result.get(key) for key in expected} == expected
+
+
+@pytest.mark.parametrize("text", ["I have 2 things to discuss", "book #2", "3", "we will be 4 people"])
+def test_bare_numbers_are_not_dates(parser, text):
+    assert "date" not in parse(parser, text)
+
+
+def test_month_and_day_without_a_year_is_never_in_the_past(parser):
+    assert parse(parser, "January 15")["date"] == date(2030, 1, 15)
+    assert parse(parser, "January 5")["date"] == date(2031, 1, 5)
+
+
+def test_fuzzy_day_of_month_that_has_passed_is_rejected(parser):
+    assert parse(parser, "the 15th")["date"] == date(2030, 1, 15)
+    assert "date" not in parse(parser, "see you on the 7th")
+
+
+def test_confidence_is_the_lowest_of_the_parts_found(parser):
+    assert parse(parser, "tomorrow at 10am")["confidence"] == 1.0
+    assert parse(parser, "the 15th")["confidence"] < parse(parser, "January 15")["confidence"]
+
+
+def test_cached_results_are_copies(parser):
+    first = parser.parse_natural_language("friday at 3pm", REFERENCE)
+    first["date"] = None
+    assert parser.parse_natural_language("Friday  at 3PM", REFERENCE)["date"] == date(2030, 1, 11)
+    assert parser.cache_stats()["hits"] == 1
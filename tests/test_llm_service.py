@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from app.services.llm_service import PRIORITY_BOOKING, PRIORITY_CHAT, LLMOverloadedError, LLMScheduler
+
+
+def make_scheduler(**overrides):
+    options = dict(max_concurrency=1, requests_per_minute=0, tokens_per_minute=0, max_queue=8, max_wait_seconds=5)
+    options.update(overrides)
+    return LLMScheduler(**options)
+
+
+def wait_until_queued(scheduler, count):
+    deadline = time.monotonic() + 5
+    while scheduler.stats()["queued"] < count:
+        assert time.monotonic() < deadline, "requests never queued"
+        time.sleep(0.005)
+
+
+def start_request(scheduler, priority, name, admitted):
+    def run():
+        with scheduler.slot(tokens=10, priority=priority):
+            admitted.append(name)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_booking_requests_are_admitted_before_earlier_chat_requests():
+    scheduler = make_scheduler()
+    admitted = []
+
+    with scheduler.slot(tokens=10):
+        threads = [start_request(scheduler, PRIORITY_CHAT, "chat-1", admitted)]
+        wait_until_queued(scheduler, 1)
+        threads.append(start_request(scheduler, PRIORITY_CHAT, "chat-2", admitted))
+        wait_until_queued(scheduler, 2)
+        threads.append(start_request(scheduler, PRIORITY_BOOKING, "booking", admitted))
+        wait_until_queued(scheduler, 3)
+
+    for thread in threads:
+        thread.join(timeout=5)
+    assert admitted == ["booking", "chat-1", "chat-2"]
+    assert scheduler.stats() == {"active": 0, "queued": 0}
+
+
+def test_requests_beyond_the_queue_limit_are_rejected_at_once():
+    scheduler = make_scheduler(max_queue=1)
+    admitted = []
+
+    with scheduler.slot(tokens=10):
+        waiting = start_request(scheduler, PRIORITY_CHAT, "queued", admitted)
+        wait_until_queued(scheduler, 1)
+        started = time.monotonic()
+        with pytest.raises(LLMOverloadedError):
+            with scheduler.slot(tokens=10):
+                pass
+        assert time.monotonic() - started < 1
+
+    waiting.join(timeout=5)
+    assert admitted == ["queued"]
+
+
+def test_requests_waiting_longer_than_max_wait_are_rejected():
+    scheduler = make_scheduler(max_wait_seconds=0.05)
+
+    with scheduler.slot(tokens=10):
+        with pytest.raises(LLMOverloadedError):
+            with scheduler.slot(tokens=10):
+                pass
+    assert scheduler.stats() == {"active": 0, "queued": 0}
+
+
+def test_requests_the_token_budget_cannot_cover_in_time_fail_fast():
+    scheduler = make_scheduler(max_concurrency=4, tokens_per_minute=600, max_wait_seconds=2)
+
+    with scheduler.slot(tokens=600):
+        pass
+    started = time.monotonic()
+    with pytest.raises(LLMOverloadedError):
+        with scheduler.slot(tokens=300):
+            pass
+    # Waiting 30s for the bucket would exceed max_wait, so it does not wait at all
+    assert time.monotonic() - started < 1
+
+
+def test_pause_holds_back_admissions():
+    scheduler = make_scheduler(max_concurrency=4, max_wait_seconds=0.05)
+    scheduler.pause(60)
+
+    with pytest.raises(LLMOverloadedError):
+        with scheduler.slot(tokens=10):
+            pass
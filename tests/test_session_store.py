@@ -0,0 +1,126 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.session_store import InMemorySessionStore, SQLiteSessionStore
+from app.utils.cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.keys() == ["a", "c"]
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=4, ttl=0)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+
+    assert cache.get("a", "missing") == "missing"
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+def test_ttl_cache_counts_hits_and_misses():
+    cache = TTLCache(maxsize=4)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_ttl_cache_delete_and_clear():
+    cache = TTLCache(maxsize=4)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.delete("a") is True
+    assert cache.delete("a") is False
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_ttl_cache_rejects_non_positive_size():
+    with pytest.raises(ValueError):
+        TTLCache(maxsize=0)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def build(ttl_seconds=3600):
+        if request.param == "memory":
+            return InMemorySessionStore(ttl_seconds=ttl_seconds)
+        return SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=ttl_seconds)
+    return build
+
+
+def test_store_round_trips_session_data(make_store):
+    store = make_store()
+    store.set("s1", {"messages": [{"role": "user", "content": "hi"}], "turns": 1})
+
+    assert store.get("s1") == {"messages": [{"role": "user", "content": "hi"}], "turns": 1}
+    assert store.list_sessions() == ["s1"]
+
+
+def test_store_set_replaces_and_delete_removes(make_store):
+    store = make_store()
+    store.set("s1", {"turns": 1})
+    store.set("s1", {"turns": 2})
+    assert store.get("s1") == {"turns": 2}
+
+    assert store.delete("s1") is True
+    assert store.delete("s1") is False
+    assert store.get("s1") is None
+    assert store.list_sessions() == []
+
+
+def test_store_expires_sessions(make_store):
+    store = make_store(ttl_seconds=0)
+    store.set("s1", {"turns": 1})
+
+    assert store.get("s1") is None
+    assert store.list_sessions() == []
+
+
+def test_memory_store_evicts_least_recently_used_session():
+    store = InMemorySessionStore(max_sessions=2)
+    store.set("a", {})
+    store.set("b", {})
+    store.get("a")
+    store.set("c", {})
+
+    assert sorted(store.list_sessions()) == ["a", "c"]
+
+
+def test_sqlite_store_is_shared_between_instances_and_threads(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    SQLiteSessionStore(path).set("s1", {"turns": 1})
+    store = SQLiteSessionStore(path)
+    start = threading.Barrier(4)
+
+    def write(index):
+        start.wait()
+        store.set(f"s{index + 2}", {"turns": index})
+        return store.get("s1")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(write, range(4))) == [{"turns": 1}] * 4
+    assert sorted(store.list_sessions()) == ["s1", "s2", "s3", "s4", "s5"]
+
+
+def test_sqlite_store_discards_corrupt_data(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    store.set("s1", {"turns": 1})
+    store._connection().execute("UPDATE sessions SET data = '{' WHERE session_id = 's1'")
+
+    assert store.get("s1") is None
+    assert store.list_sessions() == []